@@ -0,0 +1,96 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, sessionmaker
+from projects.bookshelf.common.sqlite import create_sqlite_engine
+from projects.bookshelf.main import reads
+from projects.bookshelf.main.db import Base, Bookshelf, add_author_index
+
+
+def seed(engine: sa.Engine, rows: int, authors: int) -> None:
+    Base.metadata.create_all(engine)
+    # the search index isn't under test, skip its triggers while seeding
+    with engine.begin() as conn:
+        for trigger in ("insert", "update", "delete"):
+            conn.exec_driver_sql(f"DROP TRIGGER bookshelf_fts_{trigger}")
+        conn.exec_driver_sql("DROP TABLE bookshelf_fts")
+        for start in range(0, rows, 100_000):
+            conn.execute(
+                sa.insert(Bookshelf),
+                [
+                    {
+                        "name": f"book {i}",
+                        "author": f"author {random.randrange(authors):07d}",
+                    }
+                    for i in range(start, min(start + 100_000, rows))
+                ],
+            )
+
+
+def timed(sessions: sessionmaker, call: Callable[[Session], object], n: int) -> float:
+    """Median seconds of `call` over `n` runs."""
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        with sessions() as db:
+            call(db)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def run(sessions: sessionmaker, args: argparse.Namespace) -> Dict[str, float]:
+    def author() -> str:
+        return f"author {random.randrange(args.authors):07d}"
+
+    return {
+        "books of author": timed(
+            sessions, lambda db: reads.books_page(db, args.page, None, author()), 20
+        ),
+        "counts, first page": timed(
+            sessions, lambda db: reads.author_counts(db, args.page, None), 5
+        ),
+        "counts, random page": timed(
+            sessions, lambda db: reads.author_counts(db, args.page, author()), 5
+        ),
+        "counts, every author": timed(
+            sessions, lambda db: reads.author_counts(db, args.authors, None), 3
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Author pages and per-author counts with and without the author index"
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--authors", type=int, default=50_000)
+    parser.add_argument("--page", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bookshelf-bench-") as tmp:
+        engine = create_sqlite_engine(os.path.join(tmp, "bookshelf.db"))
+        seed(engine, args.rows, args.authors)
+        print(f"seeded {args.rows} books of {args.authors} authors")
+
+        sessions = sessionmaker(bind=engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_bookshelf_author_id")
+        without = run(sessions, args)
+
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            add_author_index(conn)
+        print(f"built the author index in {time.perf_counter() - start:.2f}s")
+        indexed = run(sessions, args)
+
+        print(f"{'':>22}  {'no index':>10}  {'indexed':>10}")
+        for name in without:
+            print(
+                f"{name:>22}  {without[name] * 1e3:8.2f}ms  {indexed[name] * 1e3:8.2f}ms"
+            )
+        engine.dispose()
@@ -0,0 +1,86 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, sessionmaker
+from projects.bookshelf.common.sqlite import create_sqlite_engine
+from projects.bookshelf.main import reads
+from projects.bookshelf.main.books import Response
+from projects.bookshelf.main.db import Base, Bookshelf
+
+
+# the routes' reads before reads.py, ORM instances read attribute by attribute
+# as FastAPI does for orm_mode models
+def orm_book_by_id(db: Session, id: int) -> Response:
+    return Response.model_validate(
+        db.query(Bookshelf).filter(Bookshelf.id == id).first(), from_attributes=True
+    )
+
+
+def orm_books_page(db: Session, limit: int) -> List[Response]:
+    books = db.query(Bookshelf).order_by(Bookshelf.id).limit(limit).all()
+    return [Response.model_validate(book, from_attributes=True) for book in books]
+
+
+def core_book_by_id(db: Session, id: int) -> Response:
+    return Response.model_validate(reads.book_by_id(db, id))
+
+
+def core_books_page(db: Session, limit: int) -> List[Response]:
+    return [Response.model_validate(book) for book in reads.books_page(db, limit, None)]
+
+
+def timed(sessions: sessionmaker, call: Callable[[Session], object], n: int) -> float:
+    """Median seconds of `call` over `n` runs, a new session per run as a
+    request would have."""
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        with sessions() as db:
+            call(db)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Per-request and per-row cost of bookshelf reads through the ORM and Core"
+    )
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--page", type=int, default=1_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bookshelf-bench-") as tmp:
+        engine = create_sqlite_engine(os.path.join(tmp, "bookshelf.db"))
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(
+                sa.insert(Bookshelf),
+                [
+                    {"name": f"book {i}", "author": f"author {i % 1000}"}
+                    for i in range(args.rows)
+                ],
+            )
+        sessions = sessionmaker(bind=engine)
+        ids = [random.randint(1, args.rows) for _ in range(args.requests)]
+
+        for name, by_id, page in [
+            ("orm", orm_book_by_id, orm_books_page),
+            ("core", core_book_by_id, core_books_page),
+        ]:
+            # warm the statement caches first
+            timed(sessions, lambda db: page(db, args.page), 10)
+            it = iter(ids)
+            one = timed(sessions, lambda db: by_id(db, next(it)), args.requests)
+            many = timed(sessions, lambda db: page(db, args.page), args.requests // 100)
+            print(
+                f"{name:>5}  by id {one * 1e6:8.1f} us/request"
+                f"  page of {args.page} {many * 1e3:7.2f} ms"
+                f" ({many / args.page * 1e6:5.2f} us/row)"
+            )
+        engine.dispose()
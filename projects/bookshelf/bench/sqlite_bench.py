@@ -0,0 +1,108 @@
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+from projects.bookshelf.common.sqlite import (
+    DEFAULT,
+    TUNED,
+    Pragmas,
+    create_sqlite_engine,
+)
+from projects.bookshelf.main.db import Base, Bookshelf
+
+PROFILES = {"default": DEFAULT, "tuned": TUNED}
+
+
+def seed(engine: sa.Engine, rows: int) -> None:
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            sa.insert(Bookshelf),
+            [
+                {"name": f"book {i}", "author": f"author {i % 1000}"}
+                for i in range(rows)
+            ],
+        )
+
+
+def run(pragmas: Pragmas, args: argparse.Namespace) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory(prefix="bookshelf-bench-") as tmp:
+        engine = create_sqlite_engine(
+            os.path.join(tmp, "bookshelf.db"),
+            pragmas,
+            pool_size=args.readers + args.writers,
+        )
+        seed(engine, args.rows)
+
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+        read = sa.select(Bookshelf.name, Bookshelf.author).where(
+            Bookshelf.id == sa.bindparam("id")
+        )
+
+        def reader() -> None:
+            done = 0
+            with engine.connect() as conn:
+                while not stop.is_set():
+                    conn.execute(read, {"id": random.randint(1, args.rows)}).first()
+                    # a short transaction per read, as a request would have
+                    conn.rollback()
+                    done += 1
+            with lock:
+                counts["reads"] += done
+
+        def writer() -> None:
+            done = errors = 0
+            while not stop.is_set():
+                try:
+                    # one committed transaction per write, like POST /books/
+                    with engine.begin() as conn:
+                        conn.execute(
+                            sa.insert(Bookshelf),
+                            {"name": "new book", "author": "someone"},
+                        )
+                    done += 1
+                except OperationalError:  # database is locked
+                    errors += 1
+            with lock:
+                counts["writes"] += done
+                counts["errors"] += errors
+
+        threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+        threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return {name: count / args.seconds for name, count in counts.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Concurrent read/write throughput of bookshelf's SQLite pragma profiles"
+    )
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--profiles", nargs="+", choices=PROFILES, default=list(PROFILES)
+    )
+    args = parser.parse_args()
+
+    for name in args.profiles:
+        result = run(PROFILES[name], args)
+        print(
+            f"{name:>8}  reads/s {result['reads']:10.1f}  writes/s {result['writes']:8.1f}"
+            f"  locked/s {result['errors']:6.1f}"
+        )
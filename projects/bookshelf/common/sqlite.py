@@ -0,0 +1,85 @@
+import os
+import sqlalchemy as sa
+from dataclasses import dataclass, fields, replace
+from typing import Any, Optional
+
+# overrides of the pragma profile below, e.g. BOOKSHELF_SQLITE_SYNCHRONOUS=FULL
+ENV_PREFIX = "BOOKSHELF_SQLITE_"
+
+
+@dataclass(frozen=True)
+class Pragmas:
+    """Per-connection SQLite settings, None leaves SQLite's default in place."""
+
+    # WAL lets readers run alongside the single writer instead of blocking on it
+    journal_mode: Optional[str] = None
+    # NORMAL only syncs the WAL at checkpoints, still safe against corruption
+    synchronous: Optional[str] = None
+    # bytes of the file read through a memory map instead of read() calls
+    mmap_size: Optional[int] = None
+    # page cache per connection, negative values are KiB
+    cache_size: Optional[int] = None
+    # ms a writer waits for the lock before failing with "database is locked"
+    busy_timeout: Optional[int] = None
+    # keep temporary tables and sort spills in memory
+    temp_store: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, base: "Pragmas") -> "Pragmas":
+        overrides: dict[str, Any] = {}
+        for field in fields(cls):
+            value = os.environ.get(f"{ENV_PREFIX}{field.name.upper()}")
+            if value is not None:
+                overrides[field.name] = (
+                    int(value) if value.lstrip("-").isdigit() else value
+                )
+        return replace(base, **overrides)
+
+    def apply(self, dbapi_connection: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for field in fields(self):
+                value = getattr(self, field.name)
+                if value is not None:
+                    cursor.execute(f"PRAGMA {field.name} = {value}")
+        finally:
+            cursor.close()
+
+
+# what SQLite does out of the box: rollback journal, synchronous=FULL, no mmap
+DEFAULT = Pragmas()
+
+# tuned for a read-heavy API with concurrent writers
+TUNED = Pragmas(
+    journal_mode="WAL",
+    synchronous="NORMAL",
+    mmap_size=256 * 1024 * 1024,
+    cache_size=-64 * 1024,
+    busy_timeout=5000,
+    temp_store="MEMORY",
+)
+
+
+def db_path(env_var: str, default: str) -> str:
+    """The database file from `env_var`, or `default`, with ~ expanded."""
+    return os.path.expanduser(os.environ.get(env_var, default))
+
+
+def create_sqlite_engine(
+    path: str, pragmas: Pragmas = TUNED, **kwargs: Any
+) -> sa.Engine:
+    """An engine for the SQLite file at `path` that applies `pragmas` to every
+    new connection, overridden by the BOOKSHELF_SQLITE_* environment."""
+    engine = sa.create_engine(
+        f"sqlite:///{path}",
+        # allows connection to be used across multiple threads
+        connect_args={"check_same_thread": False},
+        **kwargs,
+    )
+    pragmas = Pragmas.from_env(pragmas)
+
+    @sa.event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection: Any, _: Any) -> None:
+        pragmas.apply(dbapi_connection)
+
+    return engine
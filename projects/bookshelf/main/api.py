@@ -1,7 +1,8 @@
 from fastapi import FastAPI, status, Request
 from fastapi.responses import JSONResponse
-from typing import Dict
+from typing import Any, Dict
 from projects.bookshelf.main.books import router as books_router
+from projects.bookshelf.main.cache import response_cache
 from projects.bookshelf.main.errors import EntityDoesNotExistError
 from projects.bookshelf.main.db import init_db
 
@@ -27,3 +28,8 @@ async def entity_not_found_handler(
 @app.get("/ping", status_code=status.HTTP_200_OK)
 async def ping() -> Dict[str, str]:
     return {"message": "pong"}
+
+
+@app.get("/stats", status_code=status.HTTP_200_OK)
+async def stats() -> Dict[str, Any]:
+    return {"response_cache": response_cache.stats()}
@@ -1,9 +1,21 @@
-from fastapi import APIRouter, Path, Depends
-from pydantic import BaseModel
+import enum
+import json
+import re
+from anyio import from_thread
+from fastapi import APIRouter, Path, Depends, Query, Request
+from fastapi import Response as HTTPResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session
-from typing import Optional, Sequence
+from urllib.parse import quote, unquote
+from typing import AsyncIterator, Iterator, List, Optional, Sequence
+from projects.bookshelf.main import reads
+from projects.bookshelf.main.cache import CachedResponse, response_cache
 from projects.bookshelf.main.db import get_db, Bookshelf
 from projects.bookshelf.main.errors import EntityDoesNotExistError
+from projects.bookshelf.main.importer import ImportFormat, ImportReport, import_books
 
 
 # Define Pydantic Data Models for Books
@@ -26,15 +38,206 @@ class Response(BaseModel):
         orm_mode = True
 
 
+class AuthorCount(BaseModel):
+    author: str
+    books: int
+
+
+class ExportFormat(enum.Enum):
+    NDJSON = "ndjson"  # one JSON object per line
+    JSON = "json"  # a single JSON array
+
+
 # Define the API routes for books
 router = APIRouter(prefix="/books", tags=["books"])
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# rows fetched from the cursor and sent per chunk by the export
+EXPORT_BATCH_SIZE = 1000
 
-# GET endpoint for retreiving all books
+
+# encode what the routes below return the way response_model would
+BOOK = TypeAdapter(Response)
+BOOK_LIST = TypeAdapter(List[Response])
+AUTHOR_COUNTS = TypeAdapter(List[AuthorCount])
+
+
+# GET endpoint for retreiving a page of books, optionally of a single author;
+# the next page starts after the id in X-Next-Cursor
 @router.get("/", response_model=Sequence[Response])
-def get_all_books(db: Session = Depends(get_db)) -> Sequence[Response]:
-    books = db.query(Bookshelf).all()
-    return books
+def get_all_books(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = Query(None, description="the id of the last book seen"),
+    author: Optional[str] = Query(None, description="only books of this author"),
+    db: Session = Depends(get_db),
+) -> HTTPResponse:
+    key = ("books", limit, after, author)
+    cached = response_cache.get(key)
+    if cached is None:
+        version = response_cache.version
+        headers = {}
+        # fetch one extra row to know whether there is a next page
+        books = reads.books_page(db, limit + 1, after, author)
+        if len(books) > limit:
+            books = books[:limit]
+            headers["X-Next-Cursor"] = str(books[-1]["id"])
+        body = BOOK_LIST.dump_json(BOOK_LIST.validate_python(books))
+        cached = CachedResponse(body, headers)
+        response_cache.put(key, version, cached)
+    return cached.response()
+
+
+# GET endpoint for the number of books of each author in name order, the next
+# page starts at X-Next-Cursor, the last author seen percent-encoded as header
+# values are latin-1
+@router.get("/authors", response_model=Sequence[AuthorCount])
+def get_author_counts(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="X-Next-Cursor of the last page"),
+    db: Session = Depends(get_db),
+) -> HTTPResponse:
+    key = ("authors", limit, after)
+    cached = response_cache.get(key)
+    if cached is None:
+        version = response_cache.version
+        headers = {}
+        last = unquote(after) if after is not None else None
+        counts = reads.author_counts(db, limit + 1, last)
+        if len(counts) > limit:
+            counts = counts[:limit]
+            headers["X-Next-Cursor"] = quote(counts[-1]["author"], safe="")
+        body = AUTHOR_COUNTS.dump_json(AUTHOR_COUNTS.validate_python(counts))
+        cached = CachedResponse(body, headers)
+        response_cache.put(key, version, cached)
+    return cached.response()
+
+
+def export_chunks(db: Session, format: ExportFormat) -> Iterator[bytes]:
+    # plain rows streamed off the cursor, never the whole shelf in memory
+    result = db.execute(
+        select(Bookshelf.id, Bookshelf.name, Bookshelf.author)
+        .order_by(Bookshelf.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if format == ExportFormat.NDJSON:
+        for rows in result.partitions():
+            yield "".join(json.dumps(row._asdict()) + "\n" for row in rows).encode()
+        return
+
+    prefix = "["
+    for rows in result.partitions():
+        yield (prefix + ",".join(json.dumps(row._asdict()) for row in rows)).encode()
+        prefix = ","
+    yield b"]" if prefix == "," else b"[]"
+
+
+# GET endpoint for streaming every book, starts sending before all are read
+@router.get("/export", response_class=StreamingResponse)
+def export_books(
+    format: ExportFormat = ExportFormat.NDJSON,
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    media_type = (
+        "application/x-ndjson" if format == ExportFormat.NDJSON else "application/json"
+    )
+    return StreamingResponse(export_chunks(db, format), media_type=media_type)
+
+
+def match_query(q: str) -> str:
+    """An FTS5 query matching books that contain every word of `q`.
+
+    Words are quoted so FTS5 operators typed by users are searched for
+    literally; a trailing `*` makes a word match as a prefix.
+    """
+    terms = []
+    for word, star in re.findall(r"([^\s*]+)(\*?)", q):
+        terms.append('"' + word.replace('"', '""') + '"' + star)
+    return " ".join(terms)
+
+
+class SearchOrder(enum.Enum):
+    RANK = "rank"  # best matches first
+    ID = "id"  # oldest first, stops reading at the page instead of scoring every match
+
+
+# ranking scores every matching row, so only the page of ids is ranked in the
+# index and joined back to bookshelf; a hit in the name counts twice a hit in
+# the author
+SEARCH_QUERIES = {
+    SearchOrder.RANK: text("""
+        SELECT bookshelf.id, bookshelf.name, bookshelf.author
+        FROM (
+            SELECT rowid, bm25(bookshelf_fts, 2.0, 1.0) AS score
+            FROM bookshelf_fts
+            WHERE bookshelf_fts MATCH :match
+            ORDER BY score, rowid
+            LIMIT :limit OFFSET :offset
+        ) AS hits
+        JOIN bookshelf ON bookshelf.id = hits.rowid
+        ORDER BY hits.score, hits.rowid
+        """),
+    SearchOrder.ID: text("""
+        SELECT bookshelf.id, bookshelf.name, bookshelf.author
+        FROM bookshelf_fts JOIN bookshelf ON bookshelf.id = bookshelf_fts.rowid
+        WHERE bookshelf_fts MATCH :match
+        ORDER BY bookshelf_fts.rowid
+        LIMIT :limit OFFSET :offset
+        """),
+}
+
+
+# GET endpoint for full-text search of names and authors; the next page starts
+# at the offset in X-Next-Offset
+@router.get("/search", response_model=Sequence[Response])
+def search_books(
+    response: HTTPResponse,
+    q: str = Query(min_length=1, description="words to find, `word*` for prefixes"),
+    order: SearchOrder = SearchOrder.RANK,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+) -> Sequence[Response]:
+    match = match_query(q)
+    if not match:
+        return []
+
+    rows = db.execute(
+        SEARCH_QUERIES[order], {"match": match, "limit": limit + 1, "offset": offset}
+    ).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return [row._asdict() for row in rows]
+
+
+def blocking_chunks(stream: AsyncIterator[bytes]) -> Iterator[bytes]:
+    # pulls the request body from the event loop into the worker thread, one
+    # chunk at a time as the import consumes it
+    while True:
+        try:
+            yield from_thread.run(stream.__anext__)
+        except StopAsyncIteration:
+            return
+
+
+# POST endpoint for importing books from a CSV or NDJSON request body, read and
+# inserted as it arrives; the format defaults to the one in Content-Type
+@router.post("/import", response_model=ImportReport)
+async def import_books_stream(
+    request: Request,
+    format: Optional[ImportFormat] = None,
+    db: Session = Depends(get_db),
+) -> ImportReport:
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = ImportFormat.CSV if "csv" in content_type else ImportFormat.NDJSON
+    chunks = blocking_chunks(request.stream().__aiter__())
+    try:
+        return await run_in_threadpool(import_books, db, chunks, format, Create)
+    finally:
+        # batches are committed as they go, even when a later one fails
+        response_cache.invalidate()
 
 
 # GET endpoint for retrieving a book by ID
@@ -42,13 +245,19 @@ def get_all_books(db: Session = Depends(get_db)) -> Sequence[Response]:
 def get_book_by_id(
     id: int = Path(description="the UUID for a respective book"),
     db: Session = Depends(get_db),
-) -> Response:
-    book = db.query(Bookshelf).filter(Bookshelf.id == id).first()
-    if not book:
-        raise EntityDoesNotExistError(
-            message=f"book with UUID {id} was not found in DB"
-        )
-    return book
+) -> HTTPResponse:
+    key = ("book", id)
+    cached = response_cache.get(key)
+    if cached is None:
+        version = response_cache.version
+        book = reads.book_by_id(db, id)
+        if not book:
+            raise EntityDoesNotExistError(
+                message=f"book with UUID {id} was not found in DB"
+            )
+        cached = CachedResponse(BOOK.dump_json(BOOK.validate_python(book)))
+        response_cache.put(key, version, cached)
+    return cached.response()
 
 
 # POST endpoint for creating a new book
@@ -57,6 +266,7 @@ def create_new_book(input_book: Create, db: Session = Depends(get_db)) -> Respon
     new_book = Bookshelf(**input_book.model_dump())
     db.add(new_book)
     db.commit()
+    response_cache.invalidate()
     db.refresh(new_book)
 
     return new_book
@@ -81,6 +291,7 @@ def update_existing_book(
         existing_book.author = input_book.author
 
     db.commit()
+    response_cache.invalidate()
     db.refresh(existing_book)
 
     return existing_book
@@ -100,4 +311,5 @@ def delete_existing_book(
 
     db.delete(existing_book)
     db.commit()
+    response_cache.invalidate()
     return existing_book
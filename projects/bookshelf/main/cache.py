@@ -0,0 +1,105 @@
+import os
+import threading
+from collections import OrderedDict
+from fastapi import Response as HTTPResponse
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+
+# total size of the cached bodies, and the largest body worth caching
+MAX_BYTES = int(os.environ.get("BOOKSHELF_RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024)))
+MAX_ENTRY_BYTES = int(
+    os.environ.get("BOOKSHELF_RESPONSE_CACHE_ENTRY_BYTES", str(1024 * 1024))
+)
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    headers: Optional[Dict[str, str]] = None
+
+    def response(self) -> HTTPResponse:
+        # the body goes out as is, nothing is validated or encoded again
+        return HTTPResponse(
+            self.body, media_type="application/json", headers=self.headers
+        )
+
+
+class ResponseCache:
+    """Encoded JSON bodies of read routes, keyed by route and parameters.
+
+    Any change to the books invalidates every entry by bumping `version`. A
+    read notes the version before it queries and its body is only stored if
+    no write finished meanwhile, so a body built from rows older than the
+    last invalidation is never served. Entries are evicted least recently
+    used first once their sizes add up to more than `max_bytes`.
+
+    The cache lives in the process: with several workers, a write only
+    invalidates the cache of the worker that handled it.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.version = 0
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.too_large = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, version: int, entry: CachedResponse) -> bool:
+        """Store `entry` for a read that started at `version`, return whether
+        it was stored."""
+        if len(entry.body) > self.max_entry_bytes:
+            self.too_large += 1
+            return False
+
+        with self._lock:
+            if version != self.version:
+                return False
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.evictions += 1
+            return True
+
+    def invalidate(self) -> None:
+        """Drop every entry, called after each committed change to the books."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "too_large": self.too_large,
+            }
+
+
+response_cache = ResponseCache(MAX_BYTES, MAX_ENTRY_BYTES)
@@ -1,15 +1,11 @@
-import os
 import sqlalchemy as sa
 from sqlalchemy.orm import sessionmaker, Session, Mapped, mapped_column
 from sqlalchemy.ext.declarative import declarative_base
-from typing import Generator
+from typing import Callable, Generator, List
+from projects.bookshelf.common.sqlite import create_sqlite_engine, db_path
 
-db_path = os.path.expanduser("~/Downloads/bookshelf.db")
-engine = sa.create_engine(
-    url=f"sqlite:///{db_path}",
-    # allows connection to be used across multiple threads
-    connect_args={"check_same_thread": False},
-)
+# WAL, synchronous=NORMAL, mmap etc., see common/sqlite.py for the overrides
+engine = create_sqlite_engine(db_path("BOOKSHELF_DB_PATH", "~/Downloads/bookshelf.db"))
 
 sess = sessionmaker(autoflush=False, autocommit=False, bind=engine)
 
@@ -40,8 +36,110 @@ class Bookshelf(Base):
     # author -> the author of the book
     author: Mapped[str]
 
+    __table_args__ = (
+        # books of an author in id order, and per-author counts, read from the
+        # index alone
+        sa.Index("ix_bookshelf_author_id", "author", "id"),
+    )
+
+
+# Full-text index over name and author. It is an external content table, the
+# text itself stays in bookshelf and triggers keep the index in step with it.
+# The prefix indexes make 2 and 3 character prefix queries (`du*`) cheap.
+SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS bookshelf_fts USING fts5(
+        name, author,
+        content='bookshelf', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bookshelf_fts_insert AFTER INSERT ON bookshelf
+    BEGIN
+        INSERT INTO bookshelf_fts (rowid, name, author)
+        VALUES (new.id, new.name, new.author);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bookshelf_fts_delete AFTER DELETE ON bookshelf
+    BEGIN
+        INSERT INTO bookshelf_fts (bookshelf_fts, rowid, name, author)
+        VALUES ('delete', old.id, old.name, old.author);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bookshelf_fts_update
+    AFTER UPDATE OF name, author ON bookshelf
+    BEGIN
+        INSERT INTO bookshelf_fts (bookshelf_fts, rowid, name, author)
+        VALUES ('delete', old.id, old.name, old.author);
+        INSERT INTO bookshelf_fts (rowid, name, author)
+        VALUES (new.id, new.name, new.author);
+    END
+    """,
+]
+
+
+def create_search_index(conn: sa.Connection) -> bool:
+    """Create the search table and triggers, True if they were missing."""
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'bookshelf_fts'"
+    ).first()
+    for statement in SEARCH_DDL:
+        conn.exec_driver_sql(statement)
+    return exists is None
+
+
+def rebuild_search_index(conn: sa.Connection) -> None:
+    """Reindex every book, for databases that had books before the index."""
+    conn.exec_driver_sql("INSERT INTO bookshelf_fts (bookshelf_fts) VALUES ('rebuild')")
+
+
+# created and dropped along with the bookshelf table by create_all/drop_all
+sa.event.listen(
+    Bookshelf.__table__,
+    "after_create",
+    lambda _, conn, **kw: create_search_index(conn),
+)
+sa.event.listen(
+    Bookshelf.__table__,
+    "before_drop",
+    sa.DDL("DROP TABLE IF EXISTS bookshelf_fts"),
+)
+
+
+def add_author_index(conn: sa.Connection) -> None:
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_bookshelf_author_id ON bookshelf (author, id)"
+    )
+
+
+# Changes to the schema of existing database files, in order. create_all only
+# creates missing tables, so anything added to an existing table goes here as
+# well as in the models above; PRAGMA user_version counts the upgrades a file
+# has had. Each must be safe to run on a file that already has the change, as
+# new files get it from create_all.
+UPGRADES: List[Callable[[sa.Connection], None]] = [
+    add_author_index,
+]
+
+
+def upgrade_db(conn: sa.Connection) -> int:
+    """Apply the upgrades a file hasn't had yet, return how many ran."""
+    version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+    for upgrade in UPGRADES[version:]:
+        upgrade(conn)
+    conn.exec_driver_sql(f"PRAGMA user_version = {len(UPGRADES)}")
+    return max(len(UPGRADES) - version, 0)
+
 
 # Create all of the DB schemas
 def init_db():
-    """Create tables if they don't exist."""
+    """Create tables if they don't exist, and upgrade existing ones."""
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        upgrade_db(conn)
+        # existing files get the search index on their first start
+        if create_search_index(conn):
+            rebuild_search_index(conn)
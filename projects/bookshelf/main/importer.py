@@ -0,0 +1,178 @@
+import codecs
+import csv
+import enum
+import json
+import time
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+from projects.bookshelf.main.db import Bookshelf
+
+# rows per executemany INSERT, and per transaction
+BATCH_SIZE = 10_000
+COMMIT_EVERY = 100_000
+# errors listed in the report, the rest are only counted
+MAX_REPORTED_ERRORS = 100
+# longest line read, in characters; longer ones are reported and skipped
+MAX_LINE_CHARS = 64 * 1024
+
+
+class ImportFormat(enum.Enum):
+    CSV = "csv"  # with a header row naming the name and author columns
+    NDJSON = "ndjson"  # one JSON object per line
+
+
+class RowError(BaseModel):
+    line: int  # 1-based, the CSV header is line 1
+    detail: str
+
+
+class ImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[RowError]
+    seconds: float
+    rows_per_second: float
+
+
+def decode_lines(
+    chunks: Iterable[bytes],
+    too_long: Callable[[int], None],
+    max_line_chars: int = MAX_LINE_CHARS,
+) -> Iterator[str]:
+    """Split a stream of UTF-8 bytes into lines, holding one line at most.
+
+    A line longer than `max_line_chars` is not held: `too_long` is called with
+    its 1-based number, the rest of it is dropped as it arrives and an empty
+    line stands in for it, so the lines after it keep their numbers.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    # the start of the current line, only the new text of a chunk is split
+    parts: List[str] = []
+    size = 0
+    number = 1
+    skipping = False
+
+    def add(text: str) -> None:
+        nonlocal parts, size, skipping
+        if skipping:
+            return
+        if size + len(text) > max_line_chars:
+            too_long(number)
+            parts, size, skipping = [], 0, True
+        else:
+            parts.append(text)
+            size += len(text)
+
+    def end() -> str:
+        nonlocal parts, size, skipping, number
+        line = "".join(parts)
+        parts, size, skipping = [], 0, False
+        number += 1
+        return line
+
+    for chunk in chunks:
+        *lines, rest = decoder.decode(chunk).split("\n")
+        for line in lines:
+            add(line)
+            yield end() + "\n"
+        add(rest)
+    add(decoder.decode(b"", final=True))
+    last = end()
+    if last:
+        yield last
+
+
+def csv_records(lines: Iterator[str]) -> Iterator[Tuple[int, Any]]:
+    reader = csv.DictReader(lines)
+    for record in reader:
+        # quoted fields may span lines, report where the record ended
+        yield reader.line_num, record
+
+
+def ndjson_records(lines: Iterator[str]) -> Iterator[Tuple[int, Any]]:
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, e
+
+
+RECORDS: Dict[ImportFormat, Callable[[Iterator[str]], Iterator[Tuple[int, Any]]]] = {
+    ImportFormat.CSV: csv_records,
+    ImportFormat.NDJSON: ndjson_records,
+}
+
+
+def describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}"
+            for e in error.errors()
+        )
+    return str(error)
+
+
+def import_books(
+    db: Session,
+    chunks: Iterable[bytes],
+    format: ImportFormat,
+    model: type[BaseModel],
+) -> ImportReport:
+    """Validate every record with `model` and insert the valid ones.
+
+    Records are parsed as the bytes arrive and inserted BATCH_SIZE at a time
+    with executemany, so memory is bounded by one batch whatever the upload
+    size. Every COMMIT_EVERY rows the transaction is committed, and rows of
+    earlier transactions stay imported if a later one fails.
+    """
+    insert = Bookshelf.__table__.insert()
+    start = time.perf_counter()
+    imported = failed = uncommitted = 0
+    errors: List[RowError] = []
+    batch: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        nonlocal imported, uncommitted
+        if batch:
+            db.execute(insert, batch)
+            imported += len(batch)
+            uncommitted += len(batch)
+            batch.clear()
+        if uncommitted >= COMMIT_EVERY:
+            db.commit()
+            uncommitted = 0
+
+    def fail(line: int, detail: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(RowError(line=line, detail=detail))
+
+    def too_long(line: int) -> None:
+        fail(line, f"line is longer than {MAX_LINE_CHARS} characters")
+
+    lines = decode_lines(chunks, too_long, MAX_LINE_CHARS)
+    for line, record in RECORDS[format](lines):
+        try:
+            if isinstance(record, Exception):
+                raise record
+            batch.append(model.model_validate(record).model_dump())
+        except (ValidationError, ValueError) as e:
+            fail(line, describe(e))
+            continue
+        if len(batch) >= BATCH_SIZE:
+            flush()
+    flush()
+    db.commit()
+
+    seconds = time.perf_counter() - start
+    return ImportReport(
+        imported=imported,
+        failed=failed,
+        errors=errors,
+        seconds=seconds,
+        rows_per_second=imported / seconds if seconds else 0.0,
+    )
@@ -0,0 +1,86 @@
+"""Read-only book queries that bypass the ORM.
+
+Loading `Bookshelf` instances means identity map bookkeeping, instance state
+and attribute instrumentation for every row, which read-only routes throw
+away once the response is built. These queries run as plain Core selects on
+the session's connection and return each row as a dict ready for the
+`Response` model. The statements are built once at import, so their compiled
+form is reused from the engine's cache on every call.
+
+Writes, and reads that modify what they load, still go through the ORM.
+"""
+
+from sqlalchemy import Result, Select, bindparam, func, select
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+from projects.bookshelf.main.db import Bookshelf
+
+# the table's columns rather than the mapped attributes, so the selects are
+# not ORM-enabled and skip the ORM's compile and loading steps
+bookshelf = Bookshelf.__table__
+BOOK_COLUMNS = (bookshelf.c.id, bookshelf.c.name, bookshelf.c.author)
+
+BOOK_BY_ID = select(*BOOK_COLUMNS).where(bookshelf.c.id == bindparam("id"))
+
+
+def page_query(by_author: bool, after: bool) -> Select:
+    query = select(*BOOK_COLUMNS).order_by(bookshelf.c.id).limit(bindparam("limit"))
+    if by_author:
+        query = query.where(bookshelf.c.author == bindparam("author"))
+    if after:
+        query = query.where(bookshelf.c.id > bindparam("after"))
+    return query
+
+
+# keyed by (filtered by author, starts after an id)
+PAGES = {
+    (by_author, after): page_query(by_author, after)
+    for by_author in (False, True)
+    for after in (False, True)
+}
+
+
+def author_counts_query(after: bool) -> Select:
+    # grouping in index order, no temporary b-tree and no table rows read
+    query = (
+        select(bookshelf.c.author, func.count().label("books"))
+        .group_by(bookshelf.c.author)
+        .order_by(bookshelf.c.author)
+        .limit(bindparam("limit"))
+    )
+    if after:
+        query = query.where(bookshelf.c.author > bindparam("after"))
+    return query
+
+
+AUTHOR_COUNTS = {after: author_counts_query(after) for after in (False, True)}
+
+
+def as_dicts(result: Result) -> List[Dict[str, Any]]:
+    # one fetchall and a zip per row, Row._asdict costs several times more
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result.all()]
+
+
+def book_by_id(db: Session, id: int) -> Optional[Dict[str, Any]]:
+    books = as_dicts(db.connection().execute(BOOK_BY_ID, {"id": id}))
+    return books[0] if books else None
+
+
+def books_page(
+    db: Session, limit: int, after: Optional[int], author: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Up to `limit` books ordered by id, starting after the id `after`, of
+    `author` only if given."""
+    query = PAGES[author is not None, after is not None]
+    params = {"limit": limit, "after": after, "author": author}
+    return as_dicts(db.connection().execute(query, params))
+
+
+def author_counts(
+    db: Session, limit: int, after: Optional[str]
+) -> List[Dict[str, Any]]:
+    """The number of books of up to `limit` authors in name order, starting
+    after the author `after`."""
+    query = AUTHOR_COUNTS[after is not None]
+    return as_dicts(db.connection().execute(query, {"limit": limit, "after": after}))
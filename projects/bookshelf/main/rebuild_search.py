@@ -0,0 +1,16 @@
+import argparse
+import time
+from projects.bookshelf.main.db import engine, init_db, rebuild_search_index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rebuild the full-text search index from the bookshelf table"
+    )
+    parser.parse_args()
+
+    init_db()
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        rebuild_search_index(conn)
+        books = conn.exec_driver_sql("SELECT count(*) FROM bookshelf").scalar()
+    print(f"indexed {books} books in {time.perf_counter() - start:.1f}s")
@@ -1,8 +1,11 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from projects.bookshelf.main import importer
 from projects.bookshelf.main.api import app
+from projects.bookshelf.main.cache import response_cache
 from projects.bookshelf.main.db import Base, get_db
 
 # Shared in-memory SQLite database URI
@@ -35,6 +38,8 @@ def client():
 
     app.dependency_overrides[get_db] = override_get_db
     app.router.on_startup.clear()
+    # cached responses of earlier tests came from another database
+    response_cache.invalidate()
 
     # Create TestClient
     with TestClient(app) as test_client:
@@ -91,6 +96,328 @@ class TestGetAllBooks:
         assert books[1]["author"] == "George Orwell"
 
 
+class TestPagination:
+    """Tests for paging through GET /books/."""
+
+    def test_pages_follow_cursor(self, client):
+        """Test that X-Next-Cursor leads through every book exactly once."""
+        for i in range(5):
+            client.post("/books/", json={"name": f"Book {i}", "author": "Author"})
+
+        names, params = [], {"limit": 2}
+        while True:
+            response = client.get("/books/", params=params)
+            assert response.status_code == 200
+            names += [book["name"] for book in response.json()]
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["after"] = response.headers["X-Next-Cursor"]
+
+        assert names == [f"Book {i}" for i in range(5)]
+
+    def test_limit_is_bounded(self, client):
+        """Test that a page size above the maximum is rejected."""
+        response = client.get("/books/", params={"limit": 100_000})
+        assert response.status_code == 422
+
+
+class TestAuthors:
+    """Tests for books by author and GET /books/authors endpoint."""
+
+    BOOKS = [
+        {"name": "Emma", "author": "Jane Austen"},
+        {"name": "Dune", "author": "Frank Herbert"},
+        {"name": "Persuasion", "author": "Jane Austen"},
+        {"name": "Anna Karenina", "author": "Лев Толстой"},
+        {"name": "Sanditon", "author": "Jane Austen"},
+    ]
+
+    def test_books_of_author(self, client):
+        """Test listing the books of one author a page at a time."""
+        for book in self.BOOKS:
+            client.post("/books/", json=book)
+
+        response = client.get("/books/", params={"author": "Jane Austen", "limit": 2})
+        assert [b["name"] for b in response.json()] == ["Emma", "Persuasion"]
+
+        after = response.headers["X-Next-Cursor"]
+        response = client.get(
+            "/books/", params={"author": "Jane Austen", "limit": 2, "after": after}
+        )
+        assert [b["name"] for b in response.json()] == ["Sanditon"]
+        assert "X-Next-Cursor" not in response.headers
+
+        assert client.get("/books/", params={"author": "Nobody"}).json() == []
+
+    def test_author_counts(self, client):
+        """Test counting books per author, paged by author name."""
+        for book in self.BOOKS:
+            client.post("/books/", json=book)
+
+        response = client.get("/books/authors", params={"limit": 2})
+        assert response.json() == [
+            {"author": "Frank Herbert", "books": 1},
+            {"author": "Jane Austen", "books": 3},
+        ]
+
+        after = response.headers["X-Next-Cursor"]
+        response = client.get("/books/authors", params={"limit": 2, "after": after})
+        assert response.json() == [{"author": "Лев Толстой", "books": 1}]
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_author_counts_follow_writes(self, client):
+        """Test that counts reflect new and deleted books."""
+        book = client.post("/books/", json=self.BOOKS[0]).json()
+        assert client.get("/books/authors").json() == [
+            {"author": "Jane Austen", "books": 1}
+        ]
+
+        client.delete(f"/books/{book['id']}")
+        assert client.get("/books/authors").json() == []
+
+
+class TestExportBooks:
+    """Tests for GET /books/export endpoint."""
+
+    def test_export_ndjson(self, client):
+        """Test streaming every book as one JSON object per line."""
+        client.post("/books/", json={"name": "Dune", "author": "Frank Herbert"})
+        client.post("/books/", json={"name": "Emma", "author": "Jane Austen"})
+
+        response = client.get("/books/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        books = [json.loads(line) for line in response.text.splitlines()]
+        assert [book["name"] for book in books] == ["Dune", "Emma"]
+        assert set(books[0]) == {"id", "name", "author"}
+
+    def test_export_json_array(self, client):
+        """Test streaming every book as a single JSON array."""
+        client.post("/books/", json={"name": "Dune", "author": "Frank Herbert"})
+        client.post("/books/", json={"name": "Emma", "author": "Jane Austen"})
+
+        response = client.get("/books/export", params={"format": "json"})
+        assert response.status_code == 200
+        assert response.json() == client.get("/books/").json()
+
+    def test_export_empty(self, client):
+        """Test exporting an empty shelf."""
+        assert client.get("/books/export", params={"format": "json"}).json() == []
+        assert client.get("/books/export").text == ""
+
+
+class TestSearchBooks:
+    """Tests for GET /books/search endpoint."""
+
+    BOOKS = [
+        {"name": "Dune", "author": "Frank Herbert"},
+        {"name": "Dune Messiah", "author": "Frank Herbert"},
+        {"name": "Emma", "author": "Jane Austen"},
+        {"name": "Persuasion", "author": "Jane Austen"},
+    ]
+
+    def search(self, client, **params):
+        response = client.get("/books/search", params=params)
+        assert response.status_code == 200
+        return [book["name"] for book in response.json()]
+
+    def test_search_name_and_author(self, client):
+        """Test that words are matched against both name and author."""
+        for book in self.BOOKS:
+            client.post("/books/", json=book)
+
+        assert self.search(client, q="austen") == ["Emma", "Persuasion"]
+        assert self.search(client, q="dune herbert") == ["Dune", "Dune Messiah"]
+        assert self.search(client, q="dune austen") == []
+
+    def test_search_prefix(self, client):
+        """Test that a trailing * matches words by prefix."""
+        for book in self.BOOKS:
+            client.post("/books/", json={"name": book["name"], "author": "x"})
+
+        assert self.search(client, q="mess*") == ["Dune Messiah"]
+        assert self.search(client, q="mess") == []
+
+    def test_search_ranks_name_matches_first(self, client):
+        """Test that a match in the name outranks a match in the author."""
+        client.post("/books/", json={"name": "About Emma", "author": "Emma Smith"})
+        client.post("/books/", json={"name": "Notes", "author": "Emma Jones"})
+        client.post("/books/", json={"name": "Emma", "author": "Jane Austen"})
+
+        assert self.search(client, q="emma")[-1] == "Notes"
+
+    def test_search_by_id(self, client):
+        """Test that results can be ordered oldest first instead of by rank."""
+        client.post("/books/", json={"name": "Notes", "author": "Emma Jones"})
+        client.post("/books/", json={"name": "Emma", "author": "Jane Austen"})
+
+        assert self.search(client, q="emma", order="id") == ["Notes", "Emma"]
+        assert self.search(client, q="emma") == ["Emma", "Notes"]
+
+    def test_search_pagination(self, client):
+        """Test that X-Next-Offset leads to the remaining results."""
+        for book in self.BOOKS:
+            client.post("/books/", json=book)
+
+        response = client.get("/books/search", params={"q": "jane", "limit": 1})
+        first = response.json()
+        offset = response.headers["X-Next-Offset"]
+
+        response = client.get(
+            "/books/search", params={"q": "jane", "limit": 1, "offset": offset}
+        )
+        assert "X-Next-Offset" not in response.headers
+        assert {first[0]["name"], response.json()[0]["name"]} == {"Emma", "Persuasion"}
+
+    def test_search_follows_updates_and_deletes(self, client):
+        """Test that the index is kept in sync with the bookshelf table."""
+        book = client.post("/books/", json=self.BOOKS[0]).json()
+
+        client.put(f"/books/{book['id']}", json={"name": "Children of Dune"})
+        assert self.search(client, q="children") == ["Children of Dune"]
+
+        client.delete(f"/books/{book['id']}")
+        assert self.search(client, q="dune") == []
+
+    def test_search_operators_are_literal(self, client):
+        """Test that FTS5 syntax in the query can't cause an error."""
+        client.post("/books/", json=self.BOOKS[0])
+        assert self.search(client, q='dune OR "NEAR(" -x') == []
+        assert self.search(client, q="*") == []
+
+
+class TestImportBooks:
+    """Tests for POST /books/import endpoint."""
+
+    def test_import_ndjson(self, client):
+        """Test importing one book per line and reporting invalid lines."""
+        body = "\n".join(
+            [
+                json.dumps({"name": "Dune", "author": "Frank Herbert"}),
+                json.dumps({"name": "Emma"}),
+                "{not json",
+                "",
+                json.dumps({"name": "Persuasion", "author": "Jane Austen"}),
+            ]
+        )
+        response = client.post(
+            "/books/import",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        report = response.json()
+        assert report["imported"] == 2
+        assert report["failed"] == 2
+        assert [error["line"] for error in report["errors"]] == [2, 3]
+        assert "author" in report["errors"][0]["detail"]
+        assert report["rows_per_second"] > 0
+
+        books = client.get("/books/").json()
+        assert [book["name"] for book in books] == ["Dune", "Persuasion"]
+
+    def test_import_csv(self, client):
+        """Test importing a CSV with a header row and quoted fields."""
+        body = 'author,name\nFrank Herbert,Dune\n"Austen, Jane","Emma\nVolume 1"\n'
+        response = client.post(
+            "/books/import", content=body, headers={"Content-Type": "text/csv"}
+        )
+        assert response.json()["imported"] == 2
+
+        books = client.get("/books/").json()
+        assert books[1] == {"id": 2, "name": "Emma\nVolume 1", "author": "Austen, Jane"}
+
+    def test_import_streamed_chunks(self, client, monkeypatch):
+        """Test that lines and characters split across chunks are rejoined, and
+        that rows are inserted over several batches."""
+        monkeypatch.setattr(importer, "BATCH_SIZE", 3)
+        monkeypatch.setattr(importer, "COMMIT_EVERY", 6)
+        body = "".join(f"Bök {i},Ånne\n" for i in range(10)).encode()
+
+        def chunks():
+            yield b"name,author\n"
+            for i in range(0, len(body), 7):
+                yield body[i : i + 7]
+
+        response = client.post(
+            "/books/import", params={"format": "csv"}, content=chunks()
+        )
+        assert response.json()["imported"] == 10
+
+        books = client.get("/books/").json()
+        assert [book["name"] for book in books] == [f"Bök {i}" for i in range(10)]
+        assert {book["author"] for book in books} == {"Ånne"}
+
+    def test_import_skips_long_lines(self, client, monkeypatch):
+        """Test that a line over the length limit is reported and skipped up
+        to the next newline, without holding it."""
+        monkeypatch.setattr(importer, "MAX_LINE_CHARS", 60)
+        dune = json.dumps({"name": "Dune", "author": "Frank Herbert"})
+        emma = json.dumps({"name": "Emma", "author": "Jane Austen"})
+        body = f"{dune}\n{'x' * 500}\n{emma}\n{{}}\n{'y' * 500}".encode()
+
+        def chunks():
+            for i in range(0, len(body), 16):
+                yield body[i : i + 16]
+
+        response = client.post("/books/import", content=chunks())
+        report = response.json()
+        assert report["imported"] == 2
+        assert report["failed"] == 3
+        assert [error["line"] for error in report["errors"]] == [2, 4, 5]
+        assert "longer than 60" in report["errors"][0]["detail"]
+
+        books = client.get("/books/").json()
+        assert [book["name"] for book in books] == ["Dune", "Emma"]
+
+    def test_import_caps_reported_errors(self, client, monkeypatch):
+        """Test that only the first errors are listed but all are counted."""
+        monkeypatch.setattr(importer, "MAX_REPORTED_ERRORS", 2)
+        response = client.post("/books/import", content="{}\n" * 5)
+        report = response.json()
+        assert report["failed"] == 5
+        assert len(report["errors"]) == 2
+
+
+class TestResponseCache:
+    """Tests for the cached responses of GET /books/ and GET /books/{id}."""
+
+    def test_repeated_reads_are_cached(self, client):
+        """Test that a repeated read is a hit returning the same response."""
+        client.post("/books/", json={"name": "Dune", "author": "Frank Herbert"})
+        client.post("/books/", json={"name": "Emma", "author": "Jane Austen"})
+
+        first = client.get("/books/", params={"limit": 1})
+        hits = response_cache.stats()["hits"]
+        second = client.get("/books/", params={"limit": 1})
+        assert response_cache.stats()["hits"] == hits + 1
+        assert second.content == first.content
+        assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+        assert second.headers["content-type"] == "application/json"
+
+        assert client.get("/books/1").json() == client.get("/books/1").json()
+        assert client.get("/stats").json()["response_cache"]["hit_rate"] > 0
+
+    def test_writes_invalidate(self, client):
+        """Test that creating, updating and deleting books are seen by reads."""
+        book = client.post("/books/", json={"name": "Dune", "author": "F"}).json()
+        assert len(client.get("/books/").json()) == 1
+        client.get(f"/books/{book['id']}")
+
+        client.post("/books/", json={"name": "Emma", "author": "J"})
+        assert len(client.get("/books/").json()) == 2
+
+        client.put(f"/books/{book['id']}", json={"name": "Dune Messiah"})
+        assert client.get(f"/books/{book['id']}").json()["name"] == "Dune Messiah"
+
+        client.delete(f"/books/{book['id']}")
+        assert client.get(f"/books/{book['id']}").status_code == 404
+        assert [b["name"] for b in client.get("/books/").json()] == ["Emma"]
+
+        client.post("/books/import", content='{"name": "Persuasion", "author": "J"}')
+        assert len(client.get("/books/").json()) == 2
+
+
 class TestGetBookById:
     """Tests for GET /books/{id} endpoint."""
 
@@ -0,0 +1,38 @@
+import sqlalchemy as sa
+from projects.bookshelf.common.sqlite import create_sqlite_engine
+from projects.bookshelf.main.db import UPGRADES, Base, upgrade_db
+
+
+def indexes(conn):
+    return {index["name"] for index in sa.inspect(conn).get_indexes("bookshelf")}
+
+
+class TestUpgradeDB:
+    """Tests for upgrading the schema of existing database files."""
+
+    def test_upgrades_file_without_author_index(self, tmp_path):
+        """Test that a file from before the author index gets it once."""
+        engine = create_sqlite_engine(str(tmp_path / "bookshelf.db"))
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE bookshelf "
+                "(id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, author VARCHAR NOT NULL)"
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO bookshelf VALUES (1, 'Emma', 'Jane Austen')"
+            )
+
+            assert upgrade_db(conn) == len(UPGRADES)
+            assert "ix_bookshelf_author_id" in indexes(conn)
+            assert conn.exec_driver_sql("PRAGMA user_version").scalar() == len(UPGRADES)
+            assert upgrade_db(conn) == 0
+        engine.dispose()
+
+    def test_new_file_is_already_upgraded(self, tmp_path):
+        """Test that upgrades are harmless on a file made by create_all."""
+        engine = create_sqlite_engine(str(tmp_path / "bookshelf.db"))
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            assert "ix_bookshelf_author_id" in indexes(conn)
+            assert upgrade_db(conn) == len(UPGRADES)
+        engine.dispose()
@@ -0,0 +1,38 @@
+from projects.bookshelf.main.cache import CachedResponse, ResponseCache
+
+
+class TestResponseCache:
+    """Tests for the encoded response cache."""
+
+    def test_evicts_least_recently_used_over_max_bytes(self):
+        """Test that entries are evicted once their bodies exceed max_bytes."""
+        cache = ResponseCache(max_bytes=10, max_entry_bytes=10)
+        cache.put("a", 0, CachedResponse(b"aaaa"))
+        cache.put("b", 0, CachedResponse(b"bbbb"))
+        cache.get("a")
+        cache.put("c", 0, CachedResponse(b"cccc"))
+
+        assert cache.get("b") is None
+        assert cache.get("a").body == b"aaaa"
+        assert cache.stats()["bytes"] == 8
+        assert cache.stats()["evictions"] == 1
+
+    def test_skips_entries_over_max_entry_bytes(self):
+        """Test that bodies larger than max_entry_bytes are not stored."""
+        cache = ResponseCache(max_bytes=100, max_entry_bytes=3)
+        assert not cache.put("a", 0, CachedResponse(b"aaaa"))
+        assert cache.get("a") is None
+        assert cache.stats()["too_large"] == 1
+
+    def test_reads_older_than_an_invalidation_are_not_stored(self):
+        """Test that a body read before a write can't be stored after it."""
+        cache = ResponseCache(max_bytes=100, max_entry_bytes=100)
+        cache.put("a", cache.version, CachedResponse(b"old"))
+        version = cache.version
+        cache.invalidate()
+
+        assert cache.get("a") is None
+        assert not cache.put("a", version, CachedResponse(b"stale"))
+        assert cache.put("a", cache.version, CachedResponse(b"new"))
+        assert cache.get("a").body == b"new"
+        assert cache.stats()["hit_rate"] == 0.5
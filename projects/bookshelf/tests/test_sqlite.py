@@ -0,0 +1,29 @@
+from projects.bookshelf.common.sqlite import TUNED, create_sqlite_engine
+
+
+def pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+class TestSQLitePragmas:
+    """Tests for the pragmas applied to new SQLite connections."""
+
+    def test_tuned_profile_is_applied(self, tmp_path):
+        """Test that every connection gets the tuned pragmas."""
+        engine = create_sqlite_engine(str(tmp_path / "bookshelf.db"), TUNED)
+        assert pragma(engine, "journal_mode") == "wal"
+        assert pragma(engine, "synchronous") == 1  # NORMAL
+        assert pragma(engine, "busy_timeout") == 5000
+        assert pragma(engine, "temp_store") == 2  # MEMORY
+        engine.dispose()
+
+    def test_environment_overrides_profile(self, tmp_path, monkeypatch):
+        """Test that BOOKSHELF_SQLITE_* variables override single pragmas."""
+        monkeypatch.setenv("BOOKSHELF_SQLITE_SYNCHRONOUS", "FULL")
+        monkeypatch.setenv("BOOKSHELF_SQLITE_CACHE_SIZE", "-1024")
+        engine = create_sqlite_engine(str(tmp_path / "bookshelf.db"), TUNED)
+        assert pragma(engine, "synchronous") == 2  # FULL
+        assert pragma(engine, "cache_size") == -1024
+        assert pragma(engine, "journal_mode") == "wal"
+        engine.dispose()
@@ -1,12 +1,9 @@
-import os
-import sqlalchemy as sa
 from sqlalchemy.orm import sessionmaker, Mapped, mapped_column
 from sqlalchemy.ext.declarative import declarative_base
+from projects.bookshelf.common.sqlite import create_sqlite_engine, db_path
 
-db_path = os.path.expanduser("~/Downloads/students.db")
-
-engine = sa.create_engine(
-    f"sqlite:///{db_path}", connect_args={"check_same_thread": False}
+engine = create_sqlite_engine(
+    db_path("BOOKSHELF_TUTORIAL_DB_PATH", "~/Downloads/students.db")
 )
 
 sess = sessionmaker(
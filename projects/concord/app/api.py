@@ -1,19 +1,68 @@
-from fastapi import FastAPI, status, Depends, HTTPException
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI, status, Depends, HTTPException, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from typing import Dict
+from typing import Any, AsyncIterator, Dict
 from projects.concord.app.common.models import User
-from projects.concord.app.common.db import get_db
-from projects.concord.app.common.utils import verify
+from projects.concord.app.common.db import (
+    bind_sessions,
+    dispose_engines,
+    get_db,
+    pool_stats,
+    replicas,
+)
+from projects.concord.app.common.lazy import resolve
+from projects.concord.app.common.metrics import (
+    MetricsMiddleware,
+    instrument_engines,
+    metrics_response,
+)
+from projects.concord.app.common.config import settings
+from projects.concord.app.common.read_cache import project_cache
+from projects.concord.app.common.utils import (
+    HashingUnavailableException,
+    calibrate,
+    password_hasher,
+)
 from projects.concord.app.common.oath2 import (
+    CredentialsException,
     JWTPayload,
     JWTResponse,
+    RefreshRequest,
+    RefreshToken,
     create_access_token,
+    create_refresh_token,
+    decode_refresh_token,
+    token_cache,
 )
+from projects.concord.app.common.revocation import revocation_store
 from projects.concord.app.projects.router import router as projects_router
 from projects.concord.app.users.router import router as users_router
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # everything below is otherwise built on first use; do it before serving so
+    # the first requests don't pay for it
+    bind_sessions()
+    instrument_engines()
+    resolve(password_hasher)
+    if settings.HASH_CALIBRATE:
+        rounds, memory_cost = calibrate(
+            settings.HASH_SCHEME,
+            settings.HASH_LATENCY_BUDGET_MS,
+            settings.HASH_MEMORY_COST,
+        )
+        password_hasher.configure(settings.HASH_SCHEME, rounds, memory_cost)
+    yield
+    password_hasher.shutdown()
+    await dispose_engines()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 app.include_router(projects_router)
 app.include_router(users_router)
 
@@ -24,25 +73,106 @@ async def ping() -> Dict[str, str]:
     return {"message": "pong"}
 
 
+# Runtime counters for sizing the connection pools, bcrypt workers and caches
+@app.get("/stats", status_code=status.HTTP_200_OK)
+async def stats() -> Dict[str, Any]:
+    return {
+        "db_pools": {name: stats.snapshot() for name, stats in pool_stats.items()},
+        "db_replicas": replicas.stats(),
+        "password_hasher": password_hasher.stats(),
+        "token_cache": token_cache.stats(),
+        "project_cache": project_cache.stats(),
+        "revocation_cache": revocation_store.stats(),
+    }
+
+
+# Per-route request, status and DB statement metrics in Prometheus text format
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return metrics_response()
+
+
 @app.post("/login", response_model=JWTResponse)
-def login(
+async def login(
     attempted_login: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    db_user = db.query(User).filter(User.email == attempted_login.username).first()
+    db_user = await db.scalar(
+        select(User).where(User.email == attempted_login.username)
+    )
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid Credentials",
         )
 
-    if not verify(attempted_login.password, db_user.password):
+    if not await password_hasher.verify(attempted_login.password, db_user.password):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid Credentials",
         )
 
-    payload = JWTPayload(user_id=db_user.id)
-    access_token = create_access_token(data=payload.model_dump())
+    # upgrade hashes made with an outdated scheme/work factor, committed by get_db
+    if password_hasher.needs_update(db_user.password):
+        try:
+            db_user.password = await password_hasher.hash(attempted_login.password)
+        except HashingUnavailableException:
+            pass  # retried on a later login
+
+    payload = JWTPayload(user_id=db_user.id).model_dump()
+    return JWTResponse(
+        access_token=create_access_token(data=payload),
+        refresh_token=create_refresh_token(
+            data=payload, generation=db_user.token_generation
+        ),
+    )
+
+
+async def revoke_family(db: AsyncSession, token: RefreshToken) -> None:
+    # tokens rotated from this family expire no later than a fresh one would
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        days=settings.REFRESH_TOKEN_EXPIRE_DAYS
+    )
+    await revocation_store.revoke(db, token.fam, expires_at)
+
+
+# Exchange a refresh token for a new access token and a rotated refresh token,
+# without the bcrypt verify of /login
+@app.post("/token/refresh", response_model=JWTResponse)
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    token = decode_refresh_token(request.refresh_token)
+
+    revoked = await revocation_store.revoked(db, token.jti, token.fam)
+    if token.fam in revoked:
+        raise CredentialsException("Refresh token has been revoked")
+
+    generation = await db.scalar(
+        select(User.token_generation).where(User.id == token.user_id)
+    )
+    if generation is None:
+        raise CredentialsException("Unknown user")
+    # issued before the user's last password change
+    if token.gen != generation:
+        raise CredentialsException("Refresh token has been revoked")
+
+    # each refresh token is exchanged at most once; presenting one again means
+    # it leaked, so every token descended from the same login is revoked too
+    if token.jti in revoked or not await revocation_store.revoke(
+        db, token.jti, token.exp
+    ):
+        await revoke_family(db, token)
+        raise CredentialsException("Refresh token has been revoked")
+
+    payload = JWTPayload(user_id=token.user_id).model_dump()
+    return JWTResponse(
+        access_token=create_access_token(data=payload),
+        refresh_token=create_refresh_token(
+            data=payload, generation=token.gen, family=token.fam
+        ),
+    )
+
 
-    return JWTResponse(access_token=access_token)
+# Log out: revoke a refresh token and everything rotated from the same login
+@app.post("/token/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    await revoke_family(db, decode_refresh_token(request.refresh_token))
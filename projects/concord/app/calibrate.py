@@ -0,0 +1,34 @@
+import argparse
+import time
+from passlib.registry import get_crypt_handler
+from projects.concord.app.common.utils import MAX_MEMORY_COST, calibrate
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pick the password hash work factor that fits a latency budget"
+    )
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--budget-ms", type=float, default=250.0)
+    parser.add_argument(
+        "--max-memory-kib",
+        type=int,
+        default=MAX_MEMORY_COST,
+        help="the most memory an argon2 hash may use",
+    )
+    args = parser.parse_args()
+
+    rounds, memory_cost = calibrate(args.scheme, args.budget_ms, args.max_memory_kib)
+
+    hasher = get_crypt_handler(args.scheme).using(rounds=rounds)
+    if memory_cost is not None:
+        hasher = hasher.using(memory_cost=memory_cost)
+    start = time.perf_counter()
+    hasher.hash("calibration")
+    elapsed_ms = 1000 * (time.perf_counter() - start)
+
+    memory = f" memory_cost={memory_cost}KiB" if memory_cost is not None else ""
+    print(f"{args.scheme} rounds={rounds}{memory} takes {elapsed_ms:.1f}ms per hash")
+    print(f"CONCORD_HASH_SCHEME={args.scheme}")
+    print(f"CONCORD_HASH_ROUNDS={rounds}")
+    if memory_cost is not None:
+        print(f"CONCORD_HASH_MEMORY_COST={memory_cost}")
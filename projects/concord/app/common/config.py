@@ -1,11 +1,72 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import List, Literal, Optional
+from projects.concord.app.common.lazy import lazy
 
 
 class Settings(BaseSettings):
     DB_URL: str
     JWT_SECRET: str
 
+    # serve requests through the asyncio driver (asyncpg/aiosqlite) instead of
+    # running the sync driver in the threadpool
+    DB_ASYNC: bool = True
+
+    # connection pool per engine and worker process; recycle is in seconds (-1
+    # disables), pre-ping tests every connection with a round trip on checkout
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+
+    # read replicas serving the GET routes (a JSON list in the environment), a
+    # replica that fails to connect is skipped for DB_REPLICA_RETRY_AFTER
+    # seconds; after a write the client reads from the primary for
+    # DB_READ_YOUR_WRITES_SECONDS (0 disables), tracked with a cookie
+    DB_REPLICA_URLS: List[str] = []
+    DB_REPLICA_RETRY_AFTER: float = 10.0
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # serialize list responses with prebuilt pydantic TypeAdapters in one pass
+    # instead of FastAPI's response_model validation + jsonable_encoder
+    FAST_JSON: bool = False
+
+    # maximum number of items accepted by a single bulk request
+    BULK_MAX_ITEMS: int = 1000
+
+    # maximum number of verified access tokens kept in memory (0 disables)
+    TOKEN_CACHE_SIZE: int = 10_000
+
+    # lifetime of refresh tokens, each exchange rotates to a new one; revoked
+    # token ids stay in the DB until they expire and the most recently seen
+    # are also remembered in memory (0 disables)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REVOCATION_CACHE_SIZE: int = 10_000
+
+    # per-owner cache of project reads, bounded by entry count (0 disables) and
+    # TTL in seconds. "memory" is private to each worker, so with several
+    # workers a write is only seen by the others once their entry expires;
+    # "sqlite" shares entries and invalidations through a file on the host
+    READ_CACHE_SIZE: int = 10_000
+    READ_CACHE_TTL: float = 30.0
+    READ_CACHE_BACKEND: Literal["memory", "sqlite"] = "memory"
+    READ_CACHE_PATH: str = "/tmp/concord-read-cache.sqlite3"
+
+    # bcrypt process pool (defaults to one worker per CPU) and its queue bound
+    HASH_WORKERS: Optional[int] = None
+    HASH_QUEUE_SIZE: int = 64
+
+    # password hashing scheme and work factor (bcrypt log2 rounds / argon2 time
+    # cost, and argon2 memory in KiB); with HASH_CALIBRATE both are benchmarked
+    # at startup to fit HASH_LATENCY_BUDGET_MS per hash instead, the memory
+    # starting from HASH_MEMORY_COST (64 MiB if unset) and halved until it fits
+    HASH_SCHEME: Literal["bcrypt", "argon2"] = "bcrypt"
+    HASH_ROUNDS: Optional[int] = None
+    HASH_MEMORY_COST: Optional[int] = None
+    HASH_CALIBRATE: bool = False
+    HASH_LATENCY_BUDGET_MS: float = 250.0
+
     model_config = SettingsConfigDict(
         env_file=f"{Path.home()}/.env",
         env_prefix="CONCORD_",
@@ -13,4 +74,5 @@ class Settings(BaseSettings):
     )
 
 
-settings = Settings()  # type: ignore
+# the environment and ~/.env are only read when a setting is first used
+settings: Settings = lazy(lambda: Settings())  # type: ignore
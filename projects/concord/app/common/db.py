@@ -1,21 +1,432 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from fastapi import Request, Response
+from sqlalchemy import (
+    CursorResult,
+    Engine,
+    Result,
+    ScalarResult,
+    URL,
+    create_engine,
+    make_url,
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from fastapi.concurrency import run_in_threadpool
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
 from projects.concord.app.common.config import settings
+from projects.concord.app.common.lazy import is_resolved, lazy
+from projects.concord.app.common.pool import PoolStats, pool_options
 
-SQLALCHEMY_DB_URL = settings.DB_URL
+# asyncio drivers standing in for the sync driver of each backend
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
 
-engine = create_engine(SQLALCHEMY_DB_URL)
-SessionLocal = sessionmaker(autoflush=False, autocommit=False, bind=engine)
 
+def to_async_url(url: str | URL) -> URL:
+    db_url = make_url(url)
+    backend = db_url.get_backend_name()
+    return db_url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
 
-def get_db() -> Generator[Session]:
-    db = SessionLocal()
+
+# the engines are created from settings on first use (or by the app's lifespan)
+_engines: Dict[str, Engine] = {}
+_async_engines: Dict[str, AsyncEngine] = {}
+_engines_lock = threading.Lock()
+
+pool_stats: Dict[str, PoolStats] = {}
+
+
+def get_engine() -> Engine:
+    with _engines_lock:
+        if "sync" not in _engines:
+            url = settings.DB_URL
+            _engines["sync"] = create_engine(url, **pool_options(url))
+            pool_stats["sync"] = PoolStats(_engines["sync"])
+        return _engines["sync"]
+
+
+def get_async_engine() -> AsyncEngine:
+    with _engines_lock:
+        if "async" not in _async_engines:
+            url = settings.DB_URL
+            _async_engines["async"] = create_async_engine(
+                to_async_url(url), **pool_options(url, asyncio=True)
+            )
+            pool_stats["async"] = PoolStats(_async_engines["async"].sync_engine)
+        return _async_engines["async"]
+
+
+class ReplicaSet:
+    """The read replicas, handed out round-robin.
+
+    Engines are created on first use and ping their connections on checkout.
+    A replica that can't be connected to is skipped for `retry_after` seconds,
+    after which the next request to pick it checks it again.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        retry_after: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.urls = list(urls)
+        self.retry_after = retry_after
+        self._clock = clock
+        self._next = itertools.count()
+        self._down_until = [0.0] * len(self.urls)
+        self._engines: Dict[int, Engine] = {}
+        self._async_engines: Dict[int, AsyncEngine] = {}
+        self._lock = threading.Lock()
+
+        self.reads = [0] * len(self.urls)
+        self.failures = [0] * len(self.urls)
+        self.fallbacks = 0
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def candidates(self) -> List[int]:
+        """Replicas to try in order, starting at the next in the rotation."""
+        if not self.urls:
+            return []
+        now = self._clock()
+        start = next(self._next)
+        order = [(start + i) % len(self.urls) for i in range(len(self.urls))]
+        return [i for i in order if self._down_until[i] <= now]
+
+    def mark_down(self, replica: int) -> None:
+        self._down_until[replica] = self._clock() + self.retry_after
+        self.failures[replica] += 1
+
+    def engine(self, replica: int) -> Engine:
+        with self._lock:
+            if replica not in self._engines:
+                url = self.urls[replica]
+                options = {**pool_options(url), "pool_pre_ping": True}
+                self._engines[replica] = create_engine(url, **options)
+                pool_stats[f"replica-{replica}"] = PoolStats(self._engines[replica])
+            return self._engines[replica]
+
+    def async_engine(self, replica: int) -> AsyncEngine:
+        with self._lock:
+            if replica not in self._async_engines:
+                url = self.urls[replica]
+                options = {**pool_options(url, asyncio=True), "pool_pre_ping": True}
+                engine = create_async_engine(to_async_url(url), **options)
+                self._async_engines[replica] = engine
+                pool_stats[f"async-replica-{replica}"] = PoolStats(engine.sync_engine)
+            return self._async_engines[replica]
+
+    async def dispose(self) -> None:
+        with self._lock:
+            engines = list(self._engines.values())
+            async_engines = list(self._async_engines.values())
+            self._engines.clear()
+            self._async_engines.clear()
+        for engine in engines:
+            engine.dispose()
+        for async_engine in async_engines:
+            await async_engine.dispose()
+
+    def stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        return {
+            "replicas": [
+                {
+                    "reads": self.reads[i],
+                    "failures": self.failures[i],
+                    "healthy": self._down_until[i] <= now,
+                }
+                for i in range(len(self.urls))
+            ],
+            "primary_fallbacks": self.fallbacks,
+        }
+
+
+replicas: ReplicaSet = lazy(
+    lambda: ReplicaSet(settings.DB_REPLICA_URLS, settings.DB_REPLICA_RETRY_AFTER)
+)
+
+
+async def dispose_engines() -> None:
+    if is_resolved(replicas):
+        await replicas.dispose()
+    with _engines_lock:
+        engines, async_engines = list(_engines.values()), list(_async_engines.values())
+        _engines.clear()
+        _async_engines.clear()
+        pool_stats.clear()
+    for engine in engines:
+        engine.dispose()
+    for async_engine in async_engines:
+        await async_engine.dispose()
+
+
+# bound to the settings' engines on first use unless bound beforehand (tests)
+SessionLocal = sessionmaker(autoflush=False, autocommit=False, expire_on_commit=False)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def bind_sessions() -> None:
+    if SessionLocal.kw.get("bind") is None:
+        SessionLocal.configure(bind=get_engine())
+    # only bound when the async path is enabled so the sync path needs no async driver
+    if settings.DB_ASYNC and AsyncSessionLocal.kw.get("bind") is None:
+        AsyncSessionLocal.configure(bind=get_async_engine())
+
+
+class ThreadedSession:
+    """The subset of the AsyncSession API used by the routers, on a sync Session.
+
+    Every call that may touch the database runs in FastAPI's threadpool, so the
+    async routes can also be served by the blocking driver for comparison.
+    """
+
+    def __init__(self, sync_session: Session):
+        self.sync_session = sync_session
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: Sequence[Any]) -> None:
+        self.sync_session.add_all(instances)
+
+    async def execute(
+        self, statement: Any, params: Any = None, **kwargs: Any
+    ) -> Result:
+        def execute() -> Result:
+            result = self.sync_session.execute(statement, params, **kwargs)
+            if isinstance(result, CursorResult) and not result.returns_rows:
+                return result
+            # buffer the rows like AsyncSession does before leaving the thread
+            return result.freeze()()
+
+        return await run_in_threadpool(execute)
+
+    async def scalar(self, statement: Any, params: Any = None, **kwargs: Any) -> Any:
+        return await run_in_threadpool(
+            self.sync_session.scalar, statement, params, **kwargs
+        )
+
+    async def scalars(
+        self, statement: Any, params: Any = None, **kwargs: Any
+    ) -> ScalarResult:
+        return (await self.execute(statement, params, **kwargs)).scalars()
+
+    async def get(self, entity: Any, ident: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance: Any) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def refresh(
+        self, instance: Any, attribute_names: Optional[Sequence[str]] = None
+    ) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def connection(self) -> Any:
+        return await run_in_threadpool(self.sync_session.connection)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+@asynccontextmanager
+async def async_session() -> AsyncIterator[AsyncSession]:
+    if AsyncSessionLocal.kw.get("bind") is None:
+        AsyncSessionLocal.configure(bind=get_async_engine())
+
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except:
+            await db.rollback()
+            raise
+
+
+@asynccontextmanager
+async def threaded_session() -> AsyncIterator[AsyncSession]:
+    if SessionLocal.kw.get("bind") is None:
+        SessionLocal.configure(bind=get_engine())
+
+    db = ThreadedSession(SessionLocal())
     try:
-        yield db
-        db.commit()
+        yield db  # type: ignore[misc]
+        await db.commit()
     except:
-        db.rollback()
+        await db.rollback()
         raise
     finally:
-        db.close()
+        await db.close()
+
+
+class ReadSession:
+    """The session of a read-only route, on the next healthy replica, or on
+    the primary if there is none or the client is pinned to it.
+
+    The database is only picked on the first query, so routes answered from
+    a cache never check out a connection. Its connection is checked out then,
+    so a dead replica is detected before the query runs and the primary can
+    stand in. Nothing is committed.
+    """
+
+    def __init__(self, asyncio: bool, pinned: bool, stack: AsyncExitStack):
+        self.asyncio = asyncio
+        self.pinned = pinned
+        # set once the primary was picked, its reads include every write
+        self.on_primary = False
+        self._stack = stack
+        self._db: Any = None
+
+    async def _session(self) -> Any:
+        if self._db is None:
+            self._db = await self._open()
+        return self._db
+
+    async def _open(self) -> Any:
+        db: Any
+        for replica in [] if self.pinned else replicas.candidates():
+            if self.asyncio:
+                db = AsyncSessionLocal(bind=replicas.async_engine(replica))
+            else:
+                db = ThreadedSession(SessionLocal(bind=replicas.engine(replica)))
+            try:
+                await db.connection()
+            except (DBAPIError, OSError):
+                await db.close()
+                replicas.mark_down(replica)
+                continue
+            replicas.reads[replica] += 1
+            self._stack.push_async_callback(db.close)
+            self._stack.push_async_callback(db.rollback)
+            return db
+
+        if len(replicas) and not self.pinned:
+            replicas.fallbacks += 1
+        self.on_primary = True
+        session = async_session if self.asyncio else threaded_session
+        return await self._stack.enter_async_context(session())
+
+    async def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Result:
+        return await (await self._session()).execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        return await (await self._session()).scalar(statement, *args, **kwargs)
+
+    async def scalars(self, statement: Any, *args: Any, **kwargs: Any) -> ScalarResult:
+        return await (await self._session()).scalars(statement, *args, **kwargs)
+
+    async def get(self, entity: Any, ident: Any, **kwargs: Any) -> Any:
+        return await (await self._session()).get(entity, ident, **kwargs)
+
+    async def refresh(self, instance: Any, *args: Any, **kwargs: Any) -> None:
+        await (await self._session()).refresh(instance, *args, **kwargs)
+
+    async def connection(self) -> Any:
+        return await (await self._session()).connection()
+
+
+@asynccontextmanager
+async def read_session(asyncio: bool, pinned: bool) -> AsyncIterator[AsyncSession]:
+    async with AsyncExitStack() as stack:
+        yield ReadSession(asyncio, pinned, stack)  # type: ignore[misc]
+
+
+def reads_pinned(db: AsyncSession) -> bool:
+    """Whether `db` serves a client that must see its own writes, which a
+    cached response may predate."""
+    return isinstance(db, ReadSession) and db.pinned
+
+
+def read_on_primary(db: AsyncSession) -> bool:
+    """Whether what `db` read came from the primary, and not from a replica
+    that may lag behind it."""
+    return not isinstance(db, ReadSession) or db.on_primary
+
+
+# set after a request that may write, reads carrying it are served by the
+# primary until the time it holds, so clients see their own writes
+PIN_COOKIE = "concord_primary_until"
+
+
+def pin_to_primary(request: Request, response: Response) -> None:
+    seconds = settings.DB_READ_YOUR_WRITES_SECONDS
+    if request.method in ("GET", "HEAD") or seconds <= 0 or not len(replicas):
+        return
+    response.set_cookie(
+        PIN_COOKIE, str(time.time() + seconds), max_age=int(seconds) + 1
+    )
+
+
+def is_pinned(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_async_db(
+    request: Request, response: Response
+) -> AsyncGenerator[AsyncSession]:
+    pin_to_primary(request, response)
+    async with async_session() as db:
+        yield db
+
+
+async def get_sync_db(
+    request: Request, response: Response
+) -> AsyncGenerator[AsyncSession]:
+    pin_to_primary(request, response)
+    async with threaded_session() as db:
+        yield db
+
+
+async def get_db(request: Request, response: Response) -> AsyncGenerator[AsyncSession]:
+    pin_to_primary(request, response)
+    session = async_session if settings.DB_ASYNC else threaded_session
+    async with session() as db:
+        yield db
+
+
+# read-only variants for GET routes, served by the replicas when configured
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession]:
+    async with read_session(asyncio=True, pinned=is_pinned(request)) as db:
+        yield db
+
+
+async def get_sync_read_db(request: Request) -> AsyncGenerator[AsyncSession]:
+    async with read_session(asyncio=False, pinned=is_pinned(request)) as db:
+        yield db
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession]:
+    async with read_session(settings.DB_ASYNC, pinned=is_pinned(request)) as db:
+        yield db
@@ -0,0 +1,26 @@
+import hashlib
+from fastapi import Response, status
+from typing import Any, Iterable, Mapping, Optional
+
+
+def make_etag(versions: Iterable[Any]) -> str:
+    """Strong ETag for a response rendered from rows with the given versions."""
+    digest = hashlib.blake2b(repr(list(versions)).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag.removeprefix("W/") for tag in candidates)
+
+
+def not_modified(etag: str, headers: Optional[Mapping[str, str]] = None) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={**(headers or {}), "ETag": etag},
+    )
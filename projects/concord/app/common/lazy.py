@@ -0,0 +1,66 @@
+import threading
+from typing import Any, Callable, Generic, Optional, TypeVar, cast
+
+T = TypeVar("T")
+
+
+class LazyProxy(Generic[T]):
+    """Stands in for the object `factory` builds, building it on first use.
+
+    Attribute reads and writes (and len()) are forwarded to the real object,
+    so module-level singletons can be imported without reading settings,
+    opening connections or loading native backends.
+    """
+
+    __slots__ = ("_factory", "_instance", "_lock")
+
+    def __init__(self, factory: Callable[[], T]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self) -> T:
+        instance: Optional[T] = object.__getattribute__(self, "_instance")
+        if instance is None:
+            with object.__getattribute__(self, "_lock"):
+                instance = object.__getattribute__(self, "_instance")
+                if instance is None:
+                    instance = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_instance", instance)
+        return cast(T, instance)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._resolve(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._resolve(), name)
+
+    def __len__(self) -> int:
+        return len(self._resolve())  # type: ignore[arg-type]
+
+    def __repr__(self) -> str:
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            return f"<lazy {object.__getattribute__(self, '_factory')!r}>"
+        return repr(instance)
+
+
+def lazy(factory: Callable[[], T]) -> T:
+    """Return a proxy for `factory()` that only calls it on first use."""
+    return cast(T, LazyProxy(factory))
+
+
+def resolve(obj: T) -> T:
+    """Build `obj` now if it is a lazy proxy, and return the real object."""
+    if isinstance(obj, LazyProxy):
+        return obj._resolve()
+    return obj
+
+
+def is_resolved(obj: Any) -> bool:
+    return not isinstance(obj, LazyProxy) or (
+        object.__getattribute__(obj, "_instance") is not None
+    )
@@ -0,0 +1,134 @@
+import time
+from contextvars import ContextVar
+from typing import Any, List, Optional
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from sqlalchemy import Engine, event
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# kept apart from prometheus_client's global registry so /metrics only
+# exposes concord's own series
+registry = CollectorRegistry()
+
+REQUESTS = Counter(
+    "concord_http_requests",
+    "HTTP requests by route and status code.",
+    ["method", "route", "status"],
+    registry=registry,
+)
+REQUEST_DURATION = Histogram(
+    "concord_http_request_duration_seconds",
+    "Time from receiving a request to sending the end of its response.",
+    ["method", "route"],
+    registry=registry,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "concord_http_requests_in_progress",
+    "Requests being served, the route is only known once they finish.",
+    ["method"],
+    registry=registry,
+)
+DB_STATEMENTS = Histogram(
+    "concord_db_statements_per_request",
+    "SQL statements executed while serving one request.",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+    registry=registry,
+)
+DB_DURATION = Histogram(
+    "concord_db_duration_per_request_seconds",
+    "Time spent executing SQL statements while serving one request.",
+    ["method", "route"],
+    registry=registry,
+)
+
+
+class RequestDBStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.seconds = 0.0
+
+
+# set for the duration of each request, copied into the threadpool and the
+# greenlets that run the async drivers
+request_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def _before_cursor_execute(conn: Any, *_: Any) -> None:
+    if request_db_stats.get() is not None:
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, *_: Any) -> None:
+    stats = request_db_stats.get()
+    if stats is not None:
+        starts: List[float] = conn.info.get("metrics_start", [])
+        if starts:
+            stats.seconds += time.perf_counter() - starts.pop()
+        stats.statements += 1
+
+
+def instrument_engines() -> None:
+    """Attribute the statements of every engine to the request running them."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """Records latency, status and DB usage of each HTTP request by route.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware, which would add a
+    task and a response stream copy to every request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        db_stats = RequestDBStats()
+        token = request_db_stats.set(db_stats)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            in_progress.dec()
+            request_db_stats.reset(token)
+
+            # the route template, so /projects/1 and /projects/2 share series
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            REQUEST_DURATION.labels(method, route).observe(duration)
+            DB_STATEMENTS.labels(method, route).observe(db_stats.statements)
+            DB_DURATION.labels(method, route).observe(db_stats.seconds)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,16 +1,35 @@
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Enum, text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import (
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    String,
+    UniqueConstraint,
+    func,
+    text,
+)
 from projects.concord.app.common.types import Priority
+from datetime import datetime, timezone
 from typing import List
 
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class Base(DeclarativeBase):
     pass
 
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # keyset pagination of a user's projects by each supported sort key
+        Index("ix_projects_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_projects_owner_id_priority_id", "owner_id", "priority", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, nullable=False)
     name: Mapped[str] = mapped_column(unique=True, nullable=False)
@@ -28,14 +47,30 @@ class Project(Base):
     created_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
-        server_default=text("'now'"),
+        server_default=func.now(),
+        default=utcnow,
+    )
+    # bumped by every UPDATE, including bulk and RETURNING statements
+    version: Mapped[int] = mapped_column(
+        nullable=False,
+        server_default=text("1"),
+        default=1,
+        onupdate=text("version + 1"),
+    )
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        default=utcnow,
+        onupdate=utcnow,
     )
 
     owner_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
 
-    owner: Mapped["User"] = relationship(back_populates="projects")
+    # never lazy-load over the wire, read paths must eager-load explicitly
+    owner: Mapped["User"] = relationship(back_populates="projects", lazy="raise_on_sql")
 
 
 class User(Base):
@@ -50,9 +85,43 @@ class User(Base):
     created_at: Mapped[DateTime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
-        server_default=text("'now'"),
+        server_default=func.now(),
+        default=utcnow,
+    )
+    version: Mapped[int] = mapped_column(
+        nullable=False,
+        server_default=text("1"),
+        default=1,
+        onupdate=text("version + 1"),
+    )
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        default=utcnow,
+        onupdate=utcnow,
+    )
+    # bumped by every password change; refresh tokens carry the generation
+    # they were issued in and are rejected once it's outdated
+    token_generation: Mapped[int] = mapped_column(
+        nullable=False, server_default=text("0"), default=0
     )
 
     projects: Mapped[List["Project"]] = relationship(
-        back_populates="owner", cascade="all, delete-orphan", passive_deletes=True
+        back_populates="owner",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise_on_sql",
+    )
+
+
+class RevokedToken(Base):
+    """A refresh token (by `jti`) or a whole token family (by `fam`) that can
+    no longer be exchanged, kept until every token it covers has expired."""
+
+    __tablename__ = "revoked_tokens"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
     )
@@ -1,17 +1,24 @@
+import secrets
 from jose import jwt, JWTError
-from typing import Dict
+from typing import Dict, Literal, Optional
 from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel, ValidationError
 from fastapi import Depends, status, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from projects.concord.app.common.cache import TTLCache
 from projects.concord.app.common.config import settings
+from projects.concord.app.common.lazy import lazy
 
-SECRET_KEY = settings.JWT_SECRET
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oath2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# verified tokens -> user id, each entry expires with the token's own `exp` claim
+token_cache: TTLCache[str, int] = lazy(
+    lambda: TTLCache(maxsize=settings.TOKEN_CACHE_SIZE)
+)
+
 
 class JWTPayload(BaseModel):
     user_id: int
@@ -19,24 +26,60 @@ class JWTPayload(BaseModel):
 
 class JWTToken(JWTPayload):
     exp: datetime
+    # tokens issued before refresh tokens existed carry no type
+    type: Literal["access"] = "access"
+
+
+class RefreshToken(JWTPayload):
+    exp: datetime
+    type: Literal["refresh"]
+    jti: str  # this token, revoked once it has been exchanged
+    fam: str  # every token rotated from the same login, revoked on reuse
+    # the user's token generation at login, outdated by a password change;
+    # tokens issued before generations existed are of the first one
+    gen: int = 0
 
 
 class JWTResponse(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 def create_access_token(data: Dict):
     to_encode = data.copy()
     expires_in = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     expiration_time = datetime.now(timezone.utc) + expires_in
     to_encode.update({"exp": expiration_time})
 
-    token = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    token = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=ALGORITHM)
 
     return token
 
 
+def create_refresh_token(
+    data: Dict, generation: int, family: Optional[str] = None
+) -> str:
+    """Sign a refresh token of the user's token `generation`, in a new family
+    unless rotating one."""
+    to_encode = data.copy()
+    expires_in = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update(
+        {
+            "exp": datetime.now(timezone.utc) + expires_in,
+            "type": "refresh",
+            "jti": secrets.token_hex(16),
+            "fam": family or secrets.token_hex(16),
+            "gen": generation,
+        }
+    )
+    return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=ALGORITHM)
+
+
 class CredentialsException(HTTPException):
     def __init__(self, detail: str = "Could not validate credentials"):
         super().__init__(
@@ -47,12 +90,29 @@ class CredentialsException(HTTPException):
 
 
 def get_current_user_id(token: str = Depends(oath2_scheme)) -> int:
+    # skip signature verification and payload validation for known tokens
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[ALGORITHM])
         jwt_token = JWTToken(**payload)
     except JWTError as e:
         raise CredentialsException(f"Invalid JWT Token: {e}")
     except ValidationError as e:
         raise CredentialsException(f"Malformed Token Payload: {e}")
 
+    token_cache.put(token, jwt_token.user_id, expires_at=jwt_token.exp.timestamp())
     return jwt_token.user_id
+
+
+def decode_refresh_token(token: str) -> RefreshToken:
+    """Check the signature and expiry of a refresh token, not its revocation."""
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[ALGORITHM])
+        return RefreshToken(**payload)
+    except JWTError as e:
+        raise CredentialsException(f"Invalid Refresh Token: {e}")
+    except ValidationError as e:
+        raise CredentialsException(f"Malformed Token Payload: {e}")
@@ -0,0 +1,106 @@
+import json
+from typing import Any, Dict, Mapping, NamedTuple, Optional
+from projects.concord.app.common.cache import CacheBackend, MemoryBackend, SQLiteBackend
+from projects.concord.app.common.config import settings
+from projects.concord.app.common.lazy import lazy
+from projects.concord.app.common.responses import RawJSONResponse
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    headers: Dict[str, str]
+
+    def encode(self) -> bytes:
+        return json.dumps(self.headers).encode() + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, value: bytes) -> "CachedResponse":
+        headers, body = value.split(b"\n", 1)
+        return cls(body, json.loads(headers))
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("etag")
+
+    def response(self) -> RawJSONResponse:
+        return RawJSONResponse(self.body, headers=self.headers)
+
+
+class OwnerCache:
+    """Read-through cache of serialized responses, partitioned by owner.
+
+    Every key embeds the owner's current generation, and `invalidate` bumps it,
+    which orphans all of that owner's entries at once. Readers fetch the
+    generation before querying the database, so a response computed from data
+    that a concurrent write has since changed is stored under the old
+    generation and never served.
+    """
+
+    def __init__(self, namespace: str, backend: CacheBackend, ttl: float):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def generation(self, owner_id: int) -> int:
+        return self.backend.counter(f"{self.namespace}:generation:{owner_id}")
+
+    def _key(self, owner_id: int, generation: int, key: Any) -> str:
+        return f"{self.namespace}:{owner_id}:{generation}:" + json.dumps(
+            key, default=str
+        )
+
+    def get(self, owner_id: int, generation: int, key: Any) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        value = self.backend.get(self._key(owner_id, generation, key))
+        return None if value is None else CachedResponse.decode(value)
+
+    def put(
+        self,
+        owner_id: int,
+        generation: int,
+        key: Any,
+        body: bytes,
+        headers: Optional[Mapping[str, str]] = None,
+        store: bool = True,
+    ) -> CachedResponse:
+        """Cache `body` and `headers` unless `store` is False, and return them
+        as a response either way."""
+        cached = CachedResponse(
+            body, {name.lower(): value for name, value in (headers or {}).items()}
+        )
+        if self.enabled and store:
+            self.backend.set(
+                self._key(owner_id, generation, key), cached.encode(), self.ttl
+            )
+        return cached
+
+    def invalidate(self, owner_id: int) -> None:
+        self.backend.incr(f"{self.namespace}:generation:{owner_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self.backend.stats())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+def make_backend() -> CacheBackend:
+    if settings.READ_CACHE_BACKEND == "sqlite":
+        return SQLiteBackend(settings.READ_CACHE_PATH, settings.READ_CACHE_SIZE)
+    return MemoryBackend(settings.READ_CACHE_SIZE)
+
+
+# GET /projects/ and /projects/{id} responses, invalidated by any write to the
+# owner's projects or to the owner (whose details are embedded in them)
+project_cache: OwnerCache = lazy(
+    lambda: OwnerCache(
+        "projects",
+        make_backend(),
+        ttl=settings.READ_CACHE_TTL if settings.READ_CACHE_SIZE > 0 else 0,
+    )
+)
@@ -0,0 +1,50 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+from typing import Any, Generic, Mapping, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class RawJSONResponse(Response):
+    """JSON response whose body was already serialized to bytes."""
+
+    media_type = "application/json"
+
+
+class ResponseAdapter(Generic[T]):
+    """Serializes a route's return value straight to JSON bytes.
+
+    With `response_model` FastAPI validates the value, dumps it to Python
+    objects and then encodes those with the stdlib json module. Here the value
+    is validated once (reading ORM attributes directly) and pydantic writes the
+    JSON in the same pass. Returning the resulting Response makes FastAPI skip
+    its own response_model handling, so keep the two types in sync.
+    """
+
+    def __init__(self, type_: Any):
+        self.adapter: TypeAdapter[T] = TypeAdapter(type_)
+
+    def dump_json(self, content: Any) -> bytes:
+        value = self.adapter.validate_python(content, from_attributes=True)
+        return self.adapter.dump_json(value)
+
+    def response(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> RawJSONResponse:
+        return RawJSONResponse(
+            self.dump_json(content), status_code=status_code, headers=headers
+        )
+
+
+def with_headers(returned: Response, response: Response) -> Response:
+    """`returned` carrying the headers set on the `response` injected into the
+    route and its dependencies, cookies included.
+
+    FastAPI only copies those onto the response it builds from a route's
+    return value; a route returning its own Response must carry them over.
+    """
+    returned.raw_headers.extend(response.raw_headers)
+    return returned
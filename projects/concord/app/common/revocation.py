@@ -0,0 +1,88 @@
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Set
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from projects.concord.app.common.cache import TTLCache
+from projects.concord.app.common.config import settings
+from projects.concord.app.common.lazy import lazy
+from projects.concord.app.common.models import RevokedToken
+
+# expired rows are deleted by the first revocation after this many seconds
+PURGE_INTERVAL = 3600.0
+
+
+class RevocationStore:
+    """Revoked refresh token ids and families.
+
+    The revoked_tokens table is the source of truth and only holds entries
+    until the tokens they cover expire. A revocation is never undone, so ids
+    found revoked are also remembered in memory until then and later lookups
+    of them (replayed or stolen tokens) skip the database.
+    """
+
+    def __init__(self, cache_size: int):
+        self._revoked: TTLCache[str, bool] = TTLCache(maxsize=cache_size)
+        self._last_purge = 0.0
+
+    async def revoked(self, db: AsyncSession, *ids: str) -> Set[str]:
+        """Return which of `ids` are revoked."""
+        found = {id for id in ids if self._revoked.get(id)}
+        if len(found) == len(ids):
+            return found
+
+        rows = (
+            await db.execute(
+                select(RevokedToken.id, RevokedToken.expires_at).where(
+                    RevokedToken.id.in_(set(ids) - found)
+                )
+            )
+        ).all()
+        for row in rows:
+            self._remember(row.id, row.expires_at)
+            found.add(row.id)
+        return found
+
+    async def revoke(self, db: AsyncSession, id: str, expires_at: datetime) -> bool:
+        """Commit `id` as revoked, return False if it already was.
+
+        The primary key makes this the single winner of concurrent attempts
+        to revoke, and therefore exchange, the same refresh token.
+        """
+        if time.monotonic() - self._last_purge > PURGE_INTERVAL:
+            self._last_purge = time.monotonic()
+            await db.execute(
+                delete(RevokedToken).where(
+                    RevokedToken.expires_at < datetime.now(timezone.utc)
+                )
+            )
+
+        db.add(RevokedToken(id=id, expires_at=expires_at))
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            revoked = False
+        else:
+            revoked = True
+
+        self._remember(id, expires_at)
+        return revoked
+
+    def _remember(self, id: str, expires_at: datetime) -> None:
+        # SQLite hands back naive datetimes, they are stored in UTC
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        self._revoked.put(id, True, expires_at=expires_at.timestamp())
+
+    def clear(self) -> None:
+        self._revoked.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._revoked.stats()
+
+
+revocation_store: RevocationStore = lazy(
+    lambda: RevocationStore(cache_size=settings.REVOCATION_CACHE_SIZE)
+)
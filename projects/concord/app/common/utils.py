@@ -1,6 +1,108 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from passlib.registry import get_crypt_handler
+from projects.concord.app.common.config import settings
+from projects.concord.app.common.lazy import lazy
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context: CryptContext = lazy(
+    lambda: CryptContext(schemes=["bcrypt"], deprecated="auto")
+)
+
+# the most memory (KiB) argon2 calibration starts from when none is configured
+MAX_MEMORY_COST = 64 * 1024
+
+
+def configure_pwd_context(
+    scheme: str, rounds: Optional[int] = None, memory_cost: Optional[int] = None
+) -> None:
+    """Hash new passwords with `scheme` at `rounds`, and with argon2 using
+    `memory_cost` KiB.
+
+    bcrypt stays enabled so existing hashes keep verifying, and anything not
+    matching the new parameters is reported by `pwd_context.needs_update`.
+    """
+    config: Dict[str, Any] = {
+        "schemes": [scheme] if scheme == "bcrypt" else [scheme, "bcrypt"],
+        "deprecated": "auto",
+    }
+    if rounds is not None:
+        config[f"{scheme}__rounds"] = rounds
+    # bcrypt has no memory parameter
+    if memory_cost is not None and scheme == "argon2":
+        config["argon2__memory_cost"] = memory_cost
+    pwd_context.load(config)
+
+
+def hash_ms(hasher: Any, samples: int) -> float:
+    """Fastest of `samples` hashes with `hasher`, in milliseconds."""
+    elapsed = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.hash("calibration")
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return 1000 * elapsed
+
+
+def calibrate_memory_cost(
+    budget_ms: float, max_memory_cost: int = MAX_MEMORY_COST, samples: int = 3
+) -> int:
+    """Return the most argon2 memory (KiB), halving down from
+    `max_memory_cost`, whose hash at the lowest time cost fits in `budget_ms`.
+    """
+    handler = get_crypt_handler("argon2")
+    # argon2 needs at least 8 KiB per lane
+    min_memory_cost = 8 * handler.parallelism
+    memory_cost = max(max_memory_cost, min_memory_cost)
+    while memory_cost > min_memory_cost:
+        hasher = handler.using(rounds=handler.min_rounds, memory_cost=memory_cost)
+        if hash_ms(hasher, samples) <= budget_ms:
+            break
+        memory_cost = max(memory_cost // 2, min_memory_cost)
+    return memory_cost
+
+
+def calibrate_rounds(
+    scheme: str,
+    budget_ms: float,
+    samples: int = 3,
+    memory_cost: Optional[int] = None,
+) -> int:
+    """Return the highest work factor whose hash time fits in `budget_ms`,
+    with argon2 at `memory_cost` KiB if given."""
+    handler = get_crypt_handler(scheme)
+    if memory_cost is not None:
+        handler = handler.using(memory_cost=memory_cost)
+    rounds = best = handler.min_rounds
+    while rounds <= handler.max_rounds:
+        if hash_ms(handler.using(rounds=rounds), samples) > budget_ms:
+            break
+        best = rounds
+        rounds += 1
+
+    return best
+
+
+def calibrate(
+    scheme: str, budget_ms: float, max_memory_cost: Optional[int] = None
+) -> Tuple[int, Optional[int]]:
+    """Return the rounds and, for argon2, the memory cost to hash with in
+    `budget_ms`.
+
+    argon2 memory is its main cost, as it's what makes each guess expensive
+    on GPUs and ASICs too, so it's picked first and the time cost (rounds)
+    only raised with whatever budget is left.
+    """
+    memory_cost = None
+    if scheme == "argon2":
+        memory_cost = calibrate_memory_cost(
+            budget_ms, max_memory_cost or MAX_MEMORY_COST
+        )
+    return calibrate_rounds(scheme, budget_ms, memory_cost=memory_cost), memory_cost
 
 
 def hash(pwd: str) -> str:
@@ -9,3 +111,122 @@ def hash(pwd: str) -> str:
 
 def verify(plain_pwd: str, hashed_pwd: str) -> bool:
     return pwd_context.verify(plain_pwd, hashed_pwd)
+
+
+class HashingUnavailableException(HTTPException):
+    def __init__(self, detail: str = "Password hashing queue is full, retry later"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "1"},
+        )
+
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated process pool.
+
+    Hashing is CPU-bound, so running it inline ties up FastAPI's shared
+    threadpool. Calls are awaited from async routes instead, and once
+    `max_pending` calls are queued or running new ones are rejected with a 503.
+    """
+
+    def __init__(self, max_workers: Optional[int], max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.scheme = "bcrypt"
+        self.rounds: Optional[int] = None
+        self.memory_cost: Optional[int] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+        self.calls = 0
+        self.rejected = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # forking a process that already runs threads is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=configure_pwd_context,
+                initargs=(self.scheme, self.rounds, self.memory_cost),
+            )
+        return self._executor
+
+    def configure(
+        self,
+        scheme: str,
+        rounds: Optional[int] = None,
+        memory_cost: Optional[int] = None,
+    ) -> None:
+        """Switch scheme/work factor here and in the workers."""
+        self.scheme = scheme
+        self.rounds = rounds
+        self.memory_cost = memory_cost
+        configure_pwd_context(scheme, rounds, memory_cost)
+        # workers pick up the new parameters when the pool is next started
+        self.shutdown()
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HashingUnavailableException()
+
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self._pending -= 1
+            latency = time.perf_counter() - start
+            self.calls += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    async def hash(self, pwd: str) -> str:
+        return await self._submit(hash, pwd)
+
+    async def verify(self, plain_pwd: str, hashed_pwd: str) -> bool:
+        return await self._submit(verify, plain_pwd, hashed_pwd)
+
+    def needs_update(self, hashed_pwd: str) -> bool:
+        # only parses the hash, cheap enough to run inline
+        return pwd_context.needs_update(hashed_pwd)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scheme": self.scheme,
+            "rounds": self.rounds,
+            "memory_cost": self.memory_cost,
+            "queue_depth": self._pending,
+            "max_pending": self.max_pending,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "avg_latency_ms": (
+                1000 * self.total_latency / self.calls if self.calls else 0.0
+            ),
+            "max_latency_ms": 1000 * self.max_latency,
+        }
+
+
+def make_password_hasher() -> PasswordHasher:
+    hasher = PasswordHasher(
+        max_workers=settings.HASH_WORKERS,
+        max_pending=settings.HASH_QUEUE_SIZE,
+    )
+    hasher.configure(
+        settings.HASH_SCHEME, settings.HASH_ROUNDS, settings.HASH_MEMORY_COST
+    )
+    return hasher
+
+
+password_hasher: PasswordHasher = lazy(make_password_hasher)
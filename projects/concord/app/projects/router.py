@@ -1,35 +1,247 @@
 from projects.concord.app.projects.schema import (
+    BulkItemError,
+    ProjectBulkCreateResponse,
+    ProjectBulkDelete,
+    ProjectBulkDeleteResponse,
+    ProjectBulkUpdate,
+    ProjectBulkUpdateResponse,
     ProjectCreate,
     ProjectCreateResponse,
     ProjectResponse,
+    ProjectSortField,
+    SortOrder,
 )
-from typing import List
-from projects.concord.app.common.models import Project
-from projects.concord.app.common.db import get_db
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, NoReturn, Optional, Sequence, Set, Tuple
+from projects.concord.app.common.config import settings
+from projects.concord.app.common.models import Project, User
+from projects.concord.app.common.db import (
+    get_db,
+    get_read_db,
+    read_on_primary,
+    reads_pinned,
+)
+from projects.concord.app.common.etag import etag_matches, make_etag, not_modified
 from projects.concord.app.common.oath2 import get_current_user_id
-from fastapi import status, HTTPException, Response, Depends, APIRouter
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from projects.concord.app.common.read_cache import project_cache
+from projects.concord.app.common.responses import ResponseAdapter, with_headers
+from projects.concord.app.common.types import Priority
+from fastapi import status, HTTPException, Header, Query, Response, Depends, APIRouter
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    bindparam,
+    delete,
+    insert,
+    literal_column,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 # Define the API routes for projects
 router = APIRouter(prefix="/projects", tags=["projects"])
 
+# used instead of response_model when settings.FAST_JSON is on, and to fill
+# the read cache
+project_adapter: ResponseAdapter[ProjectResponse] = ResponseAdapter(ProjectResponse)
+project_list_adapter: ResponseAdapter[List[ProjectResponse]] = ResponseAdapter(
+    List[ProjectResponse]
+)
+bulk_create_adapter: ResponseAdapter[ProjectBulkCreateResponse] = ResponseAdapter(
+    ProjectBulkCreateResponse
+)
+
+
+def select_projects() -> Select[Tuple[Project]]:
+    # owners are serialized with every project, load them in the same query
+    return select(Project).options(joinedload(Project.owner))
+
+
+def owner_version() -> ColumnElement[int]:
+    # project responses embed their owner, so its version is part of their ETag
+    return (
+        select(User.version)
+        .where(User.id == Project.owner_id)
+        .scalar_subquery()
+        .label("owner_version")
+    )
+
+
+# owner fields serialized in ProjectResponse
+OWNER_COLUMNS = {
+    "first_name": User.first_name,
+    "last_name": User.last_name,
+    "email": User.email,
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# note that Postgres orders priorities by declaration (LOW < ... < CRITICAL)
+SORT_COLUMNS = {
+    ProjectSortField.CREATED_AT: Project.created_at,
+    ProjectSortField.PRIORITY: Project.priority,
+}
+
 
-# Get all of the projects available
+def encode_cursor(sort_by: ProjectSortField, project: Project) -> str:
+    if sort_by == ProjectSortField.CREATED_AT:
+        value = project.created_at.isoformat()
+    else:
+        value = project.priority.name
+    payload = json.dumps([sort_by.value, value, project.id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(sort_by: ProjectSortField, cursor: str) -> Tuple[Any, int]:
+    try:
+        field, value, id = json.loads(base64.urlsafe_b64decode(cursor))
+        if field != sort_by.value:
+            raise ValueError(f"cursor was issued for sort_by={field}")
+        if sort_by == ProjectSortField.CREATED_AT:
+            return datetime.fromisoformat(value), int(id)
+        return Priority[value], int(id)
+    except (binascii.Error, KeyError, TypeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"invalid cursor: {e}",
+        )
+
+
+# Get a page of the user's projects, the next page starts after X-Next-Cursor
 @router.get("/", response_model=List[ProjectResponse])
-def get_all_projects(
-    db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)
+async def get_all_projects(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    priority: Optional[Priority] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    sort_by: ProjectSortField = ProjectSortField.CREATED_AT,
+    order: SortOrder = SortOrder.ASC,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    user_id: int = Depends(get_current_user_id),
 ):
-    projects = db.query(Project).filter(Project.owner_id == user_id).all()
+    generation = project_cache.generation(user_id)
+    cache_key = [
+        "list",
+        limit,
+        after,
+        priority,
+        created_after,
+        created_before,
+        sort_by,
+        order,
+    ]
+    # a pinned client must see its writes, which may be missing from an entry
+    # stored by another reader meanwhile
+    cached = (
+        None if reads_pinned(db) else project_cache.get(user_id, generation, cache_key)
+    )
+    if cached is not None:
+        if cached.etag is not None and etag_matches(if_none_match, cached.etag):
+            return not_modified(cached.etag)
+        return cached.response()
+
+    query = select_projects().where(Project.owner_id == user_id)
+    if priority is not None:
+        query = query.where(Project.priority == priority)
+    if created_after is not None:
+        query = query.where(Project.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(Project.created_at < created_before)
+
+    sort_column = SORT_COLUMNS[sort_by]
+    keyset = tuple_(sort_column, Project.id)
+    if after is not None:
+        last_seen = decode_cursor(sort_by, after)
+        if order == SortOrder.ASC:
+            query = query.where(keyset > last_seen)
+        else:
+            query = query.where(keyset < last_seen)
+
+    if order == SortOrder.ASC:
+        query = query.order_by(sort_column, Project.id)
+    else:
+        query = query.order_by(sort_column.desc(), Project.id.desc())
+    # fetch one extra row to know whether there is a next page
+    query = query.limit(limit + 1)
+
+    if if_none_match is not None:
+        # decide a conditional GET from the row versions alone
+        versions = await db.execute(
+            query.with_only_columns(
+                Project.id, Project.version, owner_version(), maintain_column_froms=True
+            )
+        )
+        etag = make_etag(tuple(row) for row in versions.all())
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    projects = (await db.scalars(query)).all()
+    response.headers["ETag"] = make_etag(
+        (project.id, project.version, project.owner.version) for project in projects
+    )
+    if len(projects) > limit:
+        projects = projects[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(sort_by, projects[-1])
+
+    if project_cache.enabled:
+        body = project_list_adapter.dump_json(projects)
+        # rows of a lagging replica must not outlive their read
+        return project_cache.put(
+            user_id,
+            generation,
+            cache_key,
+            body,
+            response.headers,
+            store=read_on_primary(db),
+        ).response()
+    if settings.FAST_JSON:
+        return project_list_adapter.response(projects, headers=response.headers)
     return projects
 
 
 # Get the project based on a given ID
 @router.get("/{id}", response_model=ProjectResponse)
-def get_project_by_id(
-    id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)
+async def get_project_by_id(
+    id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    user_id: int = Depends(get_current_user_id),
 ):
-    db_project = db.query(Project).filter(Project.id == id).first()
+    generation = project_cache.generation(user_id)
+    cached = (
+        None
+        if reads_pinned(db)
+        else project_cache.get(user_id, generation, ["project", id])
+    )
+    if cached is not None:
+        if cached.etag is not None and etag_matches(if_none_match, cached.etag):
+            return not_modified(cached.etag)
+        return cached.response()
+
+    if if_none_match is not None:
+        versions = await db.execute(
+            select(Project.id, Project.version, owner_version()).where(
+                Project.id == id, Project.owner_id == user_id
+            )
+        )
+        row = versions.first()
+        if row is not None and etag_matches(if_none_match, make_etag([tuple(row)])):
+            return not_modified(make_etag([tuple(row)]))
+
+    db_project = await db.scalar(select_projects().where(Project.id == id))
     if not db_project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -41,6 +253,19 @@ def get_project_by_id(
             detail=f"this project belongs to: {db_project.owner.email}, you cannot view it.",
         )
 
+    response.headers["ETag"] = make_etag(
+        [(db_project.id, db_project.version, db_project.owner.version)]
+    )
+    if project_cache.enabled:
+        body = project_adapter.dump_json(db_project)
+        return project_cache.put(
+            user_id,
+            generation,
+            ["project", id],
+            body,
+            response.headers,
+            store=read_on_primary(db),
+        ).response()
     return db_project
 
 
@@ -50,50 +275,103 @@ def get_project_by_id(
     status_code=status.HTTP_201_CREATED,
     response_model=ProjectCreateResponse,
 )
-def create_new_project(
+async def create_new_project(
     new_project: ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     owner_id: int = Depends(get_current_user_id),
 ):
     project_entry = Project(**new_project.model_dump())
     project_entry.owner_id = owner_id
     try:
         db.add(project_entry)
-        db.commit()
-        db.refresh(project_entry)
-        return project_entry
+        await db.commit()
+        project_cache.invalidate(owner_id)
+        return await db.scalar(
+            select_projects()
+            .where(Project.id == project_entry.id)
+            .execution_options(populate_existing=True)
+        )
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error from DB : {e}",
         )
 
 
-# Delete a specific project based on a given ID
-@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_project_by_id(
-    id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)
-):
-    db_query = db.query(Project).filter(Project.id == id)
-    db_project = db_query.first()
-    if not db_project:
+async def deny_project_access(db: AsyncSession, id: int, action: str) -> NoReturn:
+    """Raise the 404/401 for a project that an ownership-checked write missed."""
+    owner_email = await db.scalar(
+        select(User.email).join(Project.owner).where(Project.id == id)
+    )
+    if owner_email is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"project with id={id} does not exist",
         )
-    if db_project.owner_id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"this project belongs to: {db_project.owner.email}, you cannot delete it.",
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=f"this project belongs to: {owner_email}, you cannot {action} it.",
+    )
+
+
+def returning_project(owner_id: Optional[int] = None) -> List[ColumnElement[Any]]:
+    """Project columns plus its owner's, to read a row back from RETURNING.
+
+    INSERT ... RETURNING cannot correlate a subquery to the inserted row, so
+    inserts pass the known `owner_id` instead.
+    """
+    owner = select(User).where(
+        User.id
+        == (
+            Project.owner_id
+            if owner_id is None
+            # inlined, a bound parameter here stops the INSERT being batched
+            else literal_column(str(int(owner_id)))
         )
+    )
+    return [
+        Project.id,
+        Project.name,
+        Project.description,
+        Project.priority,
+        Project.created_at,
+        *(
+            owner.with_only_columns(column).scalar_subquery().label(f"owner_{key}")
+            for key, column in OWNER_COLUMNS.items()
+        ),
+    ]
+
 
+def project_from_row(row: Row[Any]) -> Dict[str, Any]:
+    project = dict(row._mapping)
+    project["owner"] = {key: project.pop(f"owner_{key}") for key in OWNER_COLUMNS}
+    return project
+
+
+# Delete a specific project based on a given ID
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_project_by_id(
+    id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
     try:
-        db_query.delete(synchronize_session=False)
-        db.commit()
-        return Response(status_code=status.HTTP_204_NO_CONTENT)
+        result = await db.execute(
+            delete(Project)
+            .where(Project.id == id, Project.owner_id == user_id)
+            .returning(Project.id),
+            execution_options={"synchronize_session": False},
+        )
+        if result.first() is None:
+            await deny_project_access(db, id, "delete")
+
+        await db.commit()
+        project_cache.invalidate(user_id)
+        return with_headers(Response(status_code=status.HTTP_204_NO_CONTENT), response)
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error from DB : {e}",
@@ -102,36 +380,210 @@ def delete_project_by_id(
 
 # Update the information of a project by ID
 @router.put("/{id}", response_model=ProjectResponse)
-def update_project_by_id(
+async def update_project_by_id(
     id: int,
     updated_project: ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id),
 ):
-    db_query = db.query(Project).filter(Project.id == id)
-    db_project = db_query.first()
-    if not db_project:
+    try:
+        result = await db.execute(
+            update(Project)
+            .where(Project.id == id, Project.owner_id == user_id)
+            .values(updated_project.model_dump(exclude_unset=True))
+            .returning(*returning_project()),
+            execution_options={"synchronize_session": False},
+        )
+        row = result.first()
+        if row is None:
+            await deny_project_access(db, id, "update")
+
+        await db.commit()
+        project_cache.invalidate(user_id)
+        return project_from_row(row)
+    except SQLAlchemyError as e:
+        await db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"project with id={id} does not exist",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error from DB : {e}",
         )
-    if db_project.owner_id != user_id:
+
+
+def check_bulk_size(items: Sequence[Any]) -> None:
+    if len(items) > settings.BULK_MAX_ITEMS:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"this project belongs to: {db_project.owner.email}, you cannot delete it.",
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"at most {settings.BULK_MAX_ITEMS} items per bulk request",
         )
 
+
+async def taken_names(db: AsyncSession, names: Sequence[str]) -> Dict[str, int]:
+    """Map each of `names` already used by a project to that project's id."""
+    rows = await db.execute(
+        select(Project.name, Project.id).where(Project.name.in_(set(names)))
+    )
+    return {name: id for name, id in rows.all()}
+
+
+def bulk_write_failed(e: SQLAlchemyError) -> HTTPException:
+    # a conflicting concurrent write can still slip past the pre-checks
+    if isinstance(e, IntegrityError):
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Conflict from DB, no items were written : {e}",
+        )
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Error from DB : {e}",
+    )
+
+
+# Create many projects with one multi-row INSERT, skipping invalid items
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ProjectBulkCreateResponse,
+)
+async def create_projects_in_bulk(
+    new_projects: List[ProjectCreate],
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    owner_id: int = Depends(get_current_user_id),
+):
+    check_bulk_size(new_projects)
+
+    taken = await taken_names(db, [project.name for project in new_projects])
+    rows: List[Dict[str, Any]] = []
+    errors: List[BulkItemError] = []
+    for index, project in enumerate(new_projects):
+        if project.name in taken:
+            errors.append(
+                BulkItemError(
+                    index=index, detail=f"project {project.name!r} already exists"
+                )
+            )
+            continue
+        taken[project.name] = -1
+        rows.append({**project.model_dump(), "owner_id": owner_id})
+
+    if not rows:
+        return ProjectBulkCreateResponse(created=[], errors=errors)
+
     try:
-        db_query.update(
-            updated_project.model_dump(exclude_unset=True),  # type: ignore[arg-type]
-            synchronize_session=False,
+        # names are unique so the rows can be put back in request order without
+        # sort_by_parameter_order, which makes some backends insert row by row
+        result = await db.execute(
+            insert(Project).returning(*returning_project(owner_id)), rows
         )
+        created = {row.name: project_from_row(row) for row in result.all()}
+        await db.commit()
+        project_cache.invalidate(owner_id)
+        content = {"created": [created[row["name"]] for row in rows], "errors": errors}
+        if settings.FAST_JSON:
+            return with_headers(
+                bulk_create_adapter.response(
+                    content, status_code=status.HTTP_201_CREATED
+                ),
+                response,
+            )
+        return content
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise bulk_write_failed(e)
+
 
-        db.commit()
-        return db_query.first()
+# Update many projects with one executemany UPDATE per set of changed fields
+@router.patch("/bulk", response_model=ProjectBulkUpdateResponse)
+async def update_projects_in_bulk(
+    updated_projects: List[ProjectBulkUpdate],
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    check_bulk_size(updated_projects)
+
+    owned = set(
+        await db.scalars(
+            select(Project.id).where(
+                Project.id.in_({project.id for project in updated_projects}),
+                Project.owner_id == user_id,
+            )
+        )
+    )
+    taken = await taken_names(
+        db, [project.name for project in updated_projects if project.name]
+    )
+
+    batches: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    updated: List[int] = []
+    seen: Set[int] = set()
+    errors: List[BulkItemError] = []
+    for index, project in enumerate(updated_projects):
+        values = project.model_dump(exclude_unset=True, exclude={"id"})
+        if project.id not in owned:
+            detail = f"project with id={project.id} does not exist or is not yours"
+        elif project.id in seen:
+            detail = f"project with id={project.id} appears more than once"
+        elif "name" in values and taken.get(values["name"], project.id) != project.id:
+            detail = f"project {values['name']!r} already exists"
+        else:
+            if "name" in values:
+                taken[values["name"]] = project.id
+            if values:
+                batches.setdefault(tuple(sorted(values)), []).append(
+                    {"project_id": project.id}
+                    | {f"new_{field}": value for field, value in values.items()}
+                )
+            updated.append(project.id)
+            seen.add(project.id)
+            continue
+        errors.append(BulkItemError(index=index, detail=detail))
+
+    try:
+        for fields, params in batches.items():
+            await db.execute(
+                update(Project.__table__)
+                .where(Project.id == bindparam("project_id"))
+                .values({field: bindparam(f"new_{field}") for field in fields}),
+                params,
+            )
+        await db.commit()
+        project_cache.invalidate(user_id)
+        return ProjectBulkUpdateResponse(updated=updated, errors=errors)
     except SQLAlchemyError as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error from DB : {e}",
+        await db.rollback()
+        raise bulk_write_failed(e)
+
+
+# Delete many projects with a single ownership-checked DELETE
+@router.post("/bulk/delete", response_model=ProjectBulkDeleteResponse)
+async def delete_projects_in_bulk(
+    to_delete: ProjectBulkDelete,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
+    check_bulk_size(to_delete.ids)
+
+    try:
+        result = await db.execute(
+            delete(Project)
+            .where(Project.id.in_(set(to_delete.ids)), Project.owner_id == user_id)
+            .returning(Project.id),
+            execution_options={"synchronize_session": False},
+        )
+        deleted = set(result.scalars().all())
+        await db.commit()
+        project_cache.invalidate(user_id)
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise bulk_write_failed(e)
+
+    errors = [
+        BulkItemError(
+            index=index, detail=f"project with id={id} does not exist or is not yours"
         )
+        for index, id in enumerate(to_delete.ids)
+        if id not in deleted
+    ]
+    return ProjectBulkDeleteResponse(
+        deleted=[id for id in to_delete.ids if id in deleted], errors=errors
+    )
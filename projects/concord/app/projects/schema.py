@@ -1,4 +1,5 @@
-from typing import Optional
+import enum
+from typing import List, Optional
 from pydantic import BaseModel, ConfigDict
 from projects.concord.app.common.types import Priority
 from projects.concord.app.users.schema import UserResponse
@@ -27,3 +28,44 @@ class ProjectResponse(Base):
 class ProjectCreateResponse(ProjectResponse):
     id: int
     created_at: datetime
+
+
+class ProjectSortField(enum.Enum):
+    CREATED_AT = "created_at"
+    PRIORITY = "priority"
+
+
+class SortOrder(enum.Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+class ProjectBulkUpdate(BaseModel):
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    priority: Optional[Priority] = None
+
+
+class ProjectBulkDelete(BaseModel):
+    ids: List[int]
+
+
+class BulkItemError(BaseModel):
+    index: int  # position of the item in the request
+    detail: str
+
+
+class ProjectBulkCreateResponse(BaseModel):
+    created: List[ProjectCreateResponse]
+    errors: List[BulkItemError]
+
+
+class ProjectBulkUpdateResponse(BaseModel):
+    updated: List[int]
+    errors: List[BulkItemError]
+
+
+class ProjectBulkDeleteResponse(BaseModel):
+    deleted: List[int]
+    errors: List[BulkItemError]
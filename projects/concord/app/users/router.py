@@ -3,12 +3,17 @@ from projects.concord.app.users.schema import (
     UserResponse,
     UserCreateResponse,
 )
-from fastapi import status, HTTPException, Depends, APIRouter, Response
-from sqlalchemy.orm import Session
-from projects.concord.app.common.db import get_db
-from projects.concord.app.common.utils import hash
+from fastapi import status, HTTPException, Depends, APIRouter, Header, Response
+from typing import NoReturn, Optional
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from projects.concord.app.common.db import get_db, get_read_db
+from projects.concord.app.common.etag import etag_matches, make_etag, not_modified
+from projects.concord.app.common.utils import password_hasher
 from projects.concord.app.common.models import User
 from projects.concord.app.common.oath2 import get_current_user_id
+from projects.concord.app.common.read_cache import project_cache
+from projects.concord.app.common.responses import with_headers
 from sqlalchemy.exc import SQLAlchemyError
 
 # Define the API routes for users
@@ -21,25 +26,37 @@ router = APIRouter(prefix="/users", tags=["users"])
     status_code=status.HTTP_201_CREATED,
     response_model=UserCreateResponse,
 )
-def create_new_user(new_user: UserCreate, db: Session = Depends(get_db)):
-    # Hash the password using passlib
-    hashed_password = hash(new_user.password)
+async def create_new_user(new_user: UserCreate, db: AsyncSession = Depends(get_db)):
+    # Hash the password in the dedicated bcrypt process pool
+    hashed_password = await password_hasher.hash(new_user.password)
     new_user.password = hashed_password
 
     user_entry = User(**new_user.model_dump())
     db.add(user_entry)
-    db.commit()
-    db.refresh(user_entry)
+    await db.commit()
+    await db.refresh(user_entry)
 
     return user_entry
 
 
 # Get a specific user by ID
 @router.get("/{id}", response_model=UserResponse)
-def get_user_by_id(
-    id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)
+async def get_user_by_id(
+    id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    user_id: int = Depends(get_current_user_id),
 ):
-    db_user = db.query(User).filter(User.id == id).first()
+    if if_none_match is not None:
+        # decide a conditional GET from the row version alone
+        version = await db.scalar(
+            select(User.version).where(User.id == id, User.id == user_id)
+        )
+        if version is not None and etag_matches(if_none_match, make_etag([version])):
+            return not_modified(make_etag([version]))
+
+    db_user = await db.get(User, id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -52,33 +69,46 @@ def get_user_by_id(
             detail=f"this user belongs to: {db_user.email}, you cannot view it.",
         )
 
+    response.headers["ETag"] = make_etag([db_user.version])
     return db_user
 
 
-# Delete a specific user based on a given ID
-@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user_by_id(
-    id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)
-):
-    db_query = db.query(User).filter(User.id == id)
-    db_user = db_query.first()
-    if not db_user:
+async def deny_user_access(db: AsyncSession, id: int, action: str) -> NoReturn:
+    """Raise the 404/401 for a user that an ownership-checked write missed."""
+    email = await db.scalar(select(User.email).where(User.id == id))
+    if email is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"user with id={id} does not exist",
         )
-    if db_user.id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"this user belongs to: {db_user.email}, you cannot delete it.",
-        )
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=f"this user belongs to: {email}, you cannot {action} it.",
+    )
 
+
+# Delete a specific user based on a given ID
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_user_by_id(
+    id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id),
+):
     try:
-        db_query.delete(synchronize_session=False)
-        db.commit()
-        return Response(status_code=status.HTTP_204_NO_CONTENT)
+        result = await db.execute(
+            delete(User).where(User.id == id, User.id == user_id).returning(User.id),
+            execution_options={"synchronize_session": False},
+        )
+        if result.first() is None:
+            await deny_user_access(db, id, "delete")
+
+        await db.commit()
+        # their projects are deleted by the cascade
+        project_cache.invalidate(id)
+        return with_headers(Response(status_code=status.HTTP_204_NO_CONTENT), response)
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error from DB : {e}",
@@ -87,37 +117,43 @@ def delete_user_by_id(
 
 # Update the information of a user by ID
 @router.put("/{id}", response_model=UserResponse)
-def update_user_by_id(
+async def update_user_by_id(
     id: int,
     updated_user: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id),
 ):
-    db_query = db.query(User).filter(User.id == id)
-    db_user = db_query.first()
-    if not db_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"user with id={id} does not exist",
-        )
-    if db_user.id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"this user belongs to: {db_user.email}, you cannot delete it.",
-        )
+    # don't spend a bcrypt hash on a write that can only be rejected
+    if id != user_id:
+        await deny_user_access(db, id, "update")
+
+    hashed_password = await password_hasher.hash(updated_user.password)
+    updated_user.password = hashed_password
 
     try:
-        hashed_password = hash(updated_user.password)
-        updated_user.password = hashed_password
-        db_query.update(
-            updated_user.model_dump(exclude_unset=True),  # type: ignore[arg-type]
-            synchronize_session=False,
+        db_user = await db.scalar(
+            update(User)
+            .where(User.id == id, User.id == user_id)
+            .values(
+                **updated_user.model_dump(exclude_unset=True),
+                # every update sets the password, revoking earlier refresh tokens
+                token_generation=User.token_generation + 1,
+            )
+            .returning(User),
+            execution_options={
+                "synchronize_session": False,
+                "populate_existing": True,
+            },
         )
+        if db_user is None:
+            await deny_user_access(db, id, "update")
 
-        db.commit()
-        return db_query.first()
+        await db.commit()
+        # their projects embed the owner's details
+        project_cache.invalidate(id)
+        return db_user
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error from DB : {e}",
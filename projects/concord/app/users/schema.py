@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from datetime import datetime
 
 
@@ -13,6 +13,10 @@ class UserCreate(Base):
 
 
 class UserResponse(Base):
+    # already validated by UserCreate, re-checking every serialized owner's email
+    # costs more than the rest of a project response
+    email: str = Field(json_schema_extra={"format": "email"})  # type: ignore[assignment]
+
     model_config = ConfigDict(
         from_attributes=True,  # replaces orm_mode=True
         extra="ignore",
@@ -0,0 +1,395 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List
+import httpx
+
+PASSWORD = "benchmark-password"
+
+
+@dataclass
+class Result:
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+@dataclass
+class VirtualUser:
+    """One logged-in client, the projects it owns and the ones it created."""
+
+    id: int
+    email: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    project_ids: List[int] = field(default_factory=list)
+    created_ids: List[int] = field(default_factory=list)
+
+
+Request = Callable[[httpx.AsyncClient, VirtualUser], Awaitable[httpx.Response]]
+
+
+def scenarios(seq: Iterator[int]) -> Dict[str, Request]:
+    """Each endpoint under test, as a request made on behalf of a user."""
+
+    async def login(client: httpx.AsyncClient, user: VirtualUser) -> httpx.Response:
+        return await client.post(
+            "/login", data={"username": user.email, "password": PASSWORD}
+        )
+
+    async def list_projects(client, user):
+        return await client.get(
+            "/projects/", params={"limit": 50}, headers=user.headers
+        )
+
+    async def get_project(client, user):
+        project_id = random.choice(user.project_ids)
+        return await client.get(f"/projects/{project_id}", headers=user.headers)
+
+    async def create_project(client, user):
+        project = {
+            "name": f"bench-{next(seq)}",
+            "description": "created",
+            "priority": "low",
+        }
+        response = await client.post("/projects/", json=project, headers=user.headers)
+        if response.status_code == 201:
+            user.created_ids.append(response.json()["id"])
+        return response
+
+    async def update_project(client, user):
+        project_id = random.choice(user.project_ids)
+        project = {
+            "name": f"bench-{next(seq)}",
+            "description": "updated",
+            "priority": "high",
+        }
+        return await client.put(
+            f"/projects/{project_id}", json=project, headers=user.headers
+        )
+
+    async def delete_project(client, user):
+        # deletes what the create scenario made, extra requests are 404s
+        project_id = user.created_ids.pop() if user.created_ids else 0
+        return await client.delete(f"/projects/{project_id}", headers=user.headers)
+
+    async def get_user(client, user):
+        return await client.get(f"/users/{user.id}", headers=user.headers)
+
+    async def update_user(client, user):
+        updated = {
+            "first_name": "Bench",
+            "last_name": user.email.split("@")[0],
+            "email": user.email,
+            "password": PASSWORD,
+        }
+        return await client.put(f"/users/{user.id}", json=updated, headers=user.headers)
+
+    return {
+        "POST /login": login,
+        "GET /projects/": list_projects,
+        "GET /projects/{id}": get_project,
+        "POST /projects/": create_project,
+        "PUT /projects/{id}": update_project,
+        "DELETE /projects/{id}": delete_project,
+        "GET /users/{id}": get_user,
+        "PUT /users/{id}": update_user,
+    }
+
+
+def seed(db_url: str, users: int, projects_per_user: int) -> List[VirtualUser]:
+    """Create the schema and dataset directly, bypassing the API."""
+    from sqlalchemy import create_engine, insert
+    from projects.concord.app.common.models import Base, Project, User
+    from projects.concord.app.common.lazy import resolve
+    from projects.concord.app.common.utils import hash, password_hasher
+
+    engine = create_engine(db_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    # one hash for everyone, with the scheme and work factor from settings
+    resolve(password_hasher)
+    password = hash(PASSWORD)
+    with engine.begin() as conn:
+        user_rows = conn.execute(
+            insert(User).returning(User.id, User.email),
+            [
+                {
+                    "first_name": "Bench",
+                    "last_name": f"bench{i}",
+                    "email": f"bench{i}@example.com",
+                    "password": password,
+                }
+                for i in range(users)
+            ],
+        ).all()
+        seeded = [VirtualUser(id=row.id, email=row.email) for row in user_rows]
+
+        for user in seeded:
+            project_rows = conn.execute(
+                insert(Project).returning(Project.id),
+                [
+                    {"name": f"seed-{user.id}-{i}", "owner_id": user.id}
+                    for i in range(projects_per_user)
+                ],
+            ).all()
+            user.project_ids = [row.id for row in project_rows]
+    engine.dispose()
+    return seeded
+
+
+@asynccontextmanager
+async def asgi_client() -> AsyncIterator[httpx.AsyncClient]:
+    from projects.concord.app.api import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://concord"
+        ) as client:
+            yield client
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def uvicorn_client(workers: int) -> AsyncIterator[httpx.AsyncClient]:
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "projects.concord.app.api:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}",
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+        ) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    (await client.get("/ping")).raise_for_status()
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError("uvicorn did not start")
+                    await asyncio.sleep(0.1)
+            yield client
+    finally:
+        server.terminate()
+        server.wait()
+
+
+@contextmanager
+def local_postgres() -> Iterator[str]:
+    """Start a throwaway Postgres cluster with initdb/pg_ctl from PATH."""
+    if shutil.which("initdb") is None or shutil.which("pg_ctl") is None:
+        raise SystemExit("--postgres needs initdb and pg_ctl on PATH")
+
+    with tempfile.TemporaryDirectory(prefix="concord-bench-pg-") as data:
+        port = free_port()
+        subprocess.run(
+            ["initdb", "-D", data, "-U", "bench", "--auth=trust"],
+            check=True,
+            capture_output=True,
+        )
+        subprocess.run(
+            [
+                "pg_ctl",
+                "-D",
+                data,
+                "-w",
+                "-o",
+                f"-p {port} -k {data} -c listen_addresses=127.0.0.1",
+                "start",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        try:
+            yield f"postgresql://bench@127.0.0.1:{port}/postgres"
+        finally:
+            subprocess.run(
+                ["pg_ctl", "-D", data, "-m", "fast", "stop"], capture_output=True
+            )
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    users: List[VirtualUser],
+    request: Request,
+    total: int,
+    concurrency: int,
+) -> Result:
+    latencies: List[float] = []
+    errors = 0
+    remaining = itertools.count()
+    pool = itertools.cycle(users)
+
+    async def worker() -> None:
+        nonlocal errors
+        user = next(pool)
+        while next(remaining) < total:
+            start = time.perf_counter()
+            response = await request(client, user)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400 and response.status_code != 404:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return Result(
+        requests=len(latencies),
+        errors=errors,
+        rps=len(latencies) / elapsed,
+        p50_ms=1000 * cuts[49],
+        p95_ms=1000 * cuts[94],
+        p99_ms=1000 * cuts[98],
+    )
+
+
+async def run(args: argparse.Namespace, db_url: str) -> Dict[str, Result]:
+    os.environ["CONCORD_DB_URL"] = db_url
+    os.environ.setdefault("CONCORD_JWT_SECRET", "load-benchmark")
+    users = seed(db_url, args.users, args.projects_per_user)
+
+    client_context = (
+        asgi_client() if args.mode == "asgi" else uvicorn_client(args.workers)
+    )
+    results: Dict[str, Result] = {}
+    async with client_context as client:
+        for user in users:
+            response = await client.post(
+                "/login", data={"username": user.email, "password": PASSWORD}
+            )
+            response.raise_for_status()
+            user.headers = {
+                "Authorization": f"Bearer {response.json()['access_token']}"
+            }
+
+        for name, request in scenarios(itertools.count()).items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = await run_scenario(
+                client, users, request, args.requests, args.concurrency
+            )
+            print(format_result(name, results[name]), flush=True)
+    return results
+
+
+def format_result(name: str, result: Result) -> str:
+    return (
+        f"{name:<24} {result.rps:9.1f} req/s  p50 {result.p50_ms:8.2f}ms"
+        f"  p95 {result.p95_ms:8.2f}ms  p99 {result.p99_ms:8.2f}ms"
+        f"  errors {result.errors}"
+    )
+
+
+def regressions(
+    results: Dict[str, Result], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Endpoints whose p95 or throughput got worse than `threshold` allows."""
+    found = []
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        if result.p95_ms > before["p95_ms"] * (1 + threshold):
+            found.append(
+                f"{name}: p95 {before['p95_ms']:.2f}ms -> {result.p95_ms:.2f}ms"
+            )
+        if result.rps < before["rps"] * (1 - threshold):
+            found.append(f"{name}: {before['rps']:.1f} -> {result.rps:.1f} req/s")
+        if result.errors > before["errors"]:
+            found.append(f"{name}: {before['errors']} -> {result.errors} errors")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load test the concord API offline and compare to a baseline"
+    )
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--db-url", help="defaults to a fresh SQLite file")
+    parser.add_argument(
+        "--postgres", action="store_true", help="start a local Postgres to test"
+    )
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--projects-per-user", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500, help="per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--only", nargs="+", help='endpoints, e.g. "GET /projects/"')
+    parser.add_argument("--baseline", help="JSON file to compare against")
+    parser.add_argument("--save", help="write the results as a new baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed relative regression in p95 and req/s",
+    )
+    args = parser.parse_args()
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory(prefix="concord-bench-") as tmp:
+        database = (
+            local_postgres()
+            if args.postgres
+            else nullcontext(args.db_url or f"sqlite:///{tmp}/concord.db")
+        )
+        with database as db_url:
+            results = asyncio.run(run(args, db_url))
+
+    report = {
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("baseline", "save", "threshold")
+        },
+        "results": {name: asdict(result) for name, result in results.items()},
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["config"] != report["config"]:
+            print("warning: baseline was recorded with a different config")
+        found = regressions(results, baseline, args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if found else 0)
@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from projects.concord.app.common.models import Project, User
+from projects.concord.app.common.responses import ResponseAdapter
+from projects.concord.app.common.types import Priority
+from projects.concord.app.projects.schema import ProjectResponse
+
+
+def make_projects(count: int) -> List[Project]:
+    owner = User(id=1, first_name="Ada", last_name="Lovelace", email="ada@example.com")
+    created_at = datetime.now(timezone.utc)
+    return [
+        Project(
+            id=i,
+            name=f"project {i}",
+            description="a project used to benchmark response serialization",
+            priority=list(Priority)[i % len(Priority)],
+            created_at=created_at,
+            owner_id=owner.id,
+            owner=owner,
+        )
+        for i in range(count)
+    ]
+
+
+def response_model_body(projects: List[Project]) -> bytes:
+    """What FastAPI does with response_model=List[ProjectResponse]."""
+    field = create_model_field("Response", List[ProjectResponse], mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=projects))
+    return JSONResponse(content).body
+
+
+def time_ms(fn: Callable[[], Any], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(1000 * (time.perf_counter() - start))
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare response_model and FAST_JSON serialization of projects"
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    adapter: ResponseAdapter[List[ProjectResponse]] = ResponseAdapter(
+        List[ProjectResponse]
+    )
+    for rows in args.rows:
+        projects = make_projects(rows)
+        assert adapter.dump_json(projects) == response_model_body(projects)
+
+        baseline = time_ms(lambda: response_model_body(projects), args.repeat)
+        fast = time_ms(lambda: adapter.dump_json(projects), args.repeat)
+        speedup = statistics.median(baseline) / statistics.median(fast)
+        print(
+            f"{rows:>7} rows  response_model {statistics.median(baseline):8.2f}ms"
+            f"  FAST_JSON {statistics.median(fast):8.2f}ms  ({speedup:.1f}x)"
+        )
@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# run in a fresh interpreter per sample so every import is cold
+CHILD = """
+import asyncio, json, time
+import httpx
+
+start = time.perf_counter()
+from projects.concord.app.api import app
+imported = time.perf_counter()
+
+
+async def first_response():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://concord") as client:
+            (await client.get("/ping")).raise_for_status()
+
+
+asyncio.run(first_response())
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": 1000 * (imported - start),
+    "first_response_ms": 1000 * (done - start),
+}))
+"""
+
+
+def sample(env: Dict[str, str]) -> Dict[str, float]:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure concord's import time and time to first response"
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    env = {
+        "CONCORD_DB_URL": "sqlite://",
+        "CONCORD_JWT_SECRET": "startup-benchmark",
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(sys.path),
+    }
+    samples: List[Dict[str, float]] = [sample(env) for _ in range(args.repeat)]
+    for metric in ("import_ms", "first_response_ms"):
+        values = [s[metric] for s in samples]
+        print(
+            f"{metric:>18}  median {statistics.median(values):8.1f}"
+            f"  min {min(values):8.1f}  max {max(values):8.1f}"
+        )
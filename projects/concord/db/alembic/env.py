@@ -1,4 +1,7 @@
+import logging
+import time
 from logging.config import fileConfig
+from typing import Any
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
@@ -28,6 +31,23 @@ target_metadata = Base.metadata
 # ... etc.
 config.set_main_option("sqlalchemy.url", settings.DB_URL)
 
+log = logging.getLogger("alembic.env")
+
+
+class StepTimer:
+    """Logs how long each migration step took, for `on_version_apply`."""
+
+    def __init__(self) -> None:
+        self.start = self.last = time.perf_counter()
+
+    def __call__(self, step: Any, **_: Any) -> None:
+        now = time.perf_counter()
+        log.info("%s took %.2fs", step, now - self.last)
+        self.last = now
+
+    def total(self) -> None:
+        log.info("migrations took %.2fs", time.perf_counter() - self.start)
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -66,11 +86,28 @@ def run_migrations_online() -> None:
         poolclass=pool.NullPool,
     )
 
+    # e.g. `alembic -x lock_timeout=5s upgrade head`: give up on DDL that waits
+    # that long for a lock instead of stalling every query queued behind it
+    lock_timeout = context.get_x_argument(as_dictionary=True).get("lock_timeout")
+
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        if lock_timeout and connection.dialect.name == "postgresql":
+            connection.exec_driver_sql(f"SET lock_timeout = '{lock_timeout}'")
+            connection.commit()
+
+        timer = StepTimer()
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # commit each revision on its own, so a long migration neither holds
+            # its locks until the last one finishes nor loses finished work
+            transaction_per_migration=True,
+            on_version_apply=timer,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
+        timer.total()
 
 
 if context.is_offline_mode():
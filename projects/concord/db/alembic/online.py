@@ -0,0 +1,246 @@
+"""Schema changes that keep a populated database serving traffic.
+
+Plain alembic operations take ACCESS EXCLUSIVE locks for as long as
+Postgres needs to rewrite or scan the table: adding a NOT NULL column,
+building an index or validating a foreign key blocks every read and
+write of it meanwhile. The helpers here split those changes into steps
+that only hold such locks for an instant:
+
+* add_column_online: add the column as nullable, backfill it in batches
+  committed one at a time, then enforce NOT NULL through a validated
+  CHECK constraint
+* create_index_concurrently / drop_index_concurrently: build or drop
+  the index without blocking writes, outside the migration transaction
+* create_foreign_key_online: add the constraint NOT VALID, then validate
+  it in its own transaction
+
+On other dialects (SQLite in development) they fall back to the plain
+operations, through batch mode where SQLite can't ALTER in place.
+"""
+
+import logging
+import time
+from contextlib import nullcontext
+from typing import Any, List, Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+log = logging.getLogger("alembic.online")
+
+# rows updated per backfill transaction, and the pause after each one so
+# replicas and autovacuum keep up
+BATCH_SIZE = 5_000
+BATCH_PAUSE = 0.05
+
+
+def _is_postgres() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def _is_offline() -> bool:
+    return op.get_context().as_sql
+
+
+def add_column_online(
+    table_name: str,
+    column: sa.Column,
+    value: Any,
+    *,
+    key: str = "id",
+    batch_size: int = BATCH_SIZE,
+    pause: float = BATCH_PAUSE,
+) -> None:
+    """Add `column`, fill existing rows with `value` and then apply its
+    nullability, without holding a table lock while rows are written.
+
+    `value` is a SQL expression or literal evaluated per row; the server
+    default of `column`, if any, covers rows inserted meanwhile.
+    """
+    nullable = column.nullable
+    column.nullable = True
+    op.add_column(table_name, column)
+    backfill(
+        table_name,
+        column.name,
+        value,
+        key=key,
+        batch_size=batch_size,
+        pause=pause,
+    )
+    if not nullable:
+        set_not_null(table_name, column.name)
+    column.nullable = nullable
+
+
+def backfill(
+    table_name: str,
+    column_name: str,
+    value: Any,
+    *,
+    key: str = "id",
+    batch_size: int = BATCH_SIZE,
+    pause: float = BATCH_PAUSE,
+) -> int:
+    """Set `column_name` to `value` where it is NULL, `batch_size` values of
+    the integer `key` per transaction, and return the number of rows updated.
+
+    On Postgres the migration transaction so far is committed, and each batch
+    is committed on its own and only locks the rows it updates.
+    """
+    table = sa.table(table_name, sa.column(key), sa.column(column_name))
+    update = sa.update(table).values({column_name: value})
+    pending = table.c[column_name].is_(None)
+
+    if _is_offline():
+        # no way to page through rows from a script; run it in one go
+        op.execute(update.where(pending))
+        return 0
+
+    # alembic only supports leaving the migration transaction when the DDL
+    # itself is transactional
+    autocommit = (
+        op.get_context().autocommit_block() if _is_postgres() else nullcontext()
+    )
+    with autocommit:
+        bind = op.get_bind()
+        low, high = bind.execute(
+            sa.select(sa.func.min(table.c[key]), sa.func.max(table.c[key]))
+        ).one()
+        if low is None:
+            return 0
+
+        updated = 0
+        start = time.perf_counter()
+        for lower in range(low, high + 1, batch_size):
+            result = bind.execute(
+                update.where(
+                    pending,
+                    table.c[key] >= lower,
+                    table.c[key] < lower + batch_size,
+                )
+            )
+            updated += result.rowcount
+            done = min(lower + batch_size, high + 1) - low
+            log.info(
+                "backfill %s.%s: %d rows, %.0f%% of %s range, %.1fs",
+                table_name,
+                column_name,
+                updated,
+                100 * done / (high + 1 - low),
+                key,
+                time.perf_counter() - start,
+            )
+            if pause:
+                time.sleep(pause)
+    return updated
+
+
+def set_not_null(table_name: str, column_name: str) -> None:
+    """Make a column NOT NULL once every row has a value.
+
+    SET NOT NULL scans the whole table under an exclusive lock, unless a
+    valid CHECK constraint already proves there are no NULLs. That check is
+    added NOT VALID and validated separately, which only blocks schema
+    changes while it scans.
+    """
+    if not _is_postgres():
+        with op.batch_alter_table(table_name) as batch:
+            batch.alter_column(column_name, nullable=False)
+        return
+
+    check = f"{table_name}_{column_name}_not_null"
+    op.create_check_constraint(
+        check,
+        table_name,
+        sa.column(column_name).is_not(None),
+        postgresql_not_valid=True,
+    )
+    validate_constraint(table_name, check)
+    op.alter_column(table_name, column_name, nullable=False)
+    op.drop_constraint(check, table_name, type_="check")
+
+
+def create_index_concurrently(
+    index_name: str,
+    table_name: str,
+    columns: Sequence[Any],
+    **kw: Any,
+) -> None:
+    """Build an index without blocking writes to the table.
+
+    CONCURRENTLY can't run in a transaction, so the migration transaction so
+    far is committed first. A build that fails or is interrupted leaves an
+    invalid index behind; it is dropped when the migration is rerun.
+    """
+    if not _is_postgres():
+        op.create_index(index_name, table_name, columns, **kw)
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            index_name,
+            table_name=table_name,
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            index_name, table_name, columns, postgresql_concurrently=True, **kw
+        )
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    if not _is_postgres():
+        op.drop_index(index_name, table_name=table_name)
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            index_name,
+            table_name=table_name,
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def create_foreign_key_online(
+    constraint_name: str,
+    source_table: str,
+    referent_table: str,
+    local_cols: List[str],
+    remote_cols: List[str],
+    **kw: Any,
+) -> None:
+    """Add a foreign key without scanning the table under lock.
+
+    NOT VALID enforces it for new writes at once; checking the existing rows
+    is left to VALIDATE CONSTRAINT, which lets reads and writes continue.
+    """
+    if not _is_postgres():
+        with op.batch_alter_table(source_table) as batch:
+            batch.create_foreign_key(
+                constraint_name, referent_table, local_cols, remote_cols, **kw
+            )
+        return
+
+    op.create_foreign_key(
+        constraint_name,
+        source_table,
+        referent_table,
+        local_cols,
+        remote_cols,
+        postgresql_not_valid=True,
+        **kw,
+    )
+    validate_constraint(source_table, constraint_name)
+
+
+def validate_constraint(table_name: str, constraint_name: str) -> None:
+    """Check existing rows against a NOT VALID constraint in its own
+    transaction, so the lock taken to add it is released first."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            sa.text(
+                f'ALTER TABLE "{table_name}" VALIDATE CONSTRAINT "{constraint_name}"'
+            )
+        )
@@ -0,0 +1,37 @@
+"""add user token generations
+
+Revision ID: 21e8e5ae6b4b
+Revises: 7c3f9a1e5d28
+Create Date: 2026-10-18 23:41:06.214873
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "21e8e5ae6b4b"
+down_revision: Union[str, Sequence[str], None] = "7c3f9a1e5d28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # bumped by every password change, older refresh tokens are rejected
+    op.add_column(
+        "users",
+        sa.Column(
+            "token_generation",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "token_generation")
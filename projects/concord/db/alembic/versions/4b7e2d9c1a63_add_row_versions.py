@@ -0,0 +1,46 @@
+"""add row versions
+
+Revision ID: 4b7e2d9c1a63
+Revises: 99cce7c35475
+Create Date: 2026-10-18 19:02:17.540163
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "4b7e2d9c1a63"
+down_revision: Union[str, Sequence[str], None] = "99cce7c35475"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # bumped by every UPDATE, the ETags of GET responses are derived from it
+    for table in ("projects", "users"):
+        op.add_column(
+            table,
+            sa.Column(
+                "version", sa.Integer(), server_default=sa.text("1"), nullable=False
+            ),
+        )
+        op.add_column(
+            table,
+            sa.Column(
+                "updated_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+                nullable=False,
+            ),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("users", "projects"):
+        op.drop_column(table, "updated_at")
+        op.drop_column(table, "version")
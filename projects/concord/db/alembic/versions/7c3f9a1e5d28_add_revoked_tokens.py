@@ -0,0 +1,36 @@
+"""add revoked tokens
+
+Revision ID: 7c3f9a1e5d28
+Revises: 4b7e2d9c1a63
+Create Date: 2026-10-18 21:14:52.318406
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3f9a1e5d28"
+down_revision: Union[str, Sequence[str], None] = "4b7e2d9c1a63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # refresh token ids and families that can no longer be exchanged
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("id", sa.String(length=32), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_revoked_tokens_expires_at", table_name="revoked_tokens")
+    op.drop_table("revoked_tokens")
@@ -0,0 +1,41 @@
+"""add project keyset indexes
+
+Revision ID: 99cce7c35475
+Revises: 561b4ae1e7cd
+Create Date: 2026-10-18 10:12:41.208417
+
+"""
+
+from typing import Sequence, Union
+
+from projects.concord.db.alembic.online import (
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "99cce7c35475"
+down_revision: Union[str, Sequence[str], None] = "561b4ae1e7cd"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GET /projects/ filters by owner and pages by (sort key, id)
+    create_index_concurrently(
+        "ix_projects_owner_id_created_at_id",
+        "projects",
+        ["owner_id", "created_at", "id"],
+    )
+    create_index_concurrently(
+        "ix_projects_owner_id_priority_id",
+        "projects",
+        ["owner_id", "priority", "id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently("ix_projects_owner_id_priority_id", "projects")
+    drop_index_concurrently("ix_projects_owner_id_created_at_id", "projects")
@@ -0,0 +1,6 @@
+import os
+
+# the app's settings require these; the tests build their own databases and
+# tokens, so any value does unless the environment already sets one
+os.environ.setdefault("CONCORD_DB_URL", "sqlite://")
+os.environ.setdefault("CONCORD_JWT_SECRET", "concord-tests")
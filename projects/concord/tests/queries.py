@@ -0,0 +1,30 @@
+from contextlib import contextmanager
+from typing import Any, Iterator, List
+from sqlalchemy import Engine, event
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[List[str]]:
+    """Collect every SQL statement `engine` executes inside the block."""
+    statements: List[str] = []
+
+    def before_cursor_execute(_conn: Any, _cursor: Any, statement: str, *_: Any):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(engine: Engine, limit: int) -> Iterator[List[str]]:
+    """Fail if the block executes more than `limit` SQL statements on `engine`."""
+    with count_queries(engine) as statements:
+        yield statements
+
+    assert len(statements) <= limit, (
+        f"expected at most {limit} queries, got {len(statements)}:\n"
+        + "\n".join(statements)
+    )
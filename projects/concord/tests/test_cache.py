@@ -0,0 +1,117 @@
+import pytest
+from projects.concord.app.common.cache import MemoryBackend, SQLiteBackend, TTLCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+    """Tests for the in-process TTL/LRU cache."""
+
+    def test_get_returns_cached_value(self):
+        """Test that a stored entry is returned and counted as a hit."""
+        cache = TTLCache(maxsize=2, clock=FakeClock())
+        cache.put("a", 1, expires_at=2000.0)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_entry_expires_at_its_own_deadline(self):
+        """Test that entries are dropped once their expiry has passed."""
+        clock = FakeClock()
+        cache = TTLCache(maxsize=2, clock=clock)
+        cache.put("a", 1, expires_at=1010.0)
+        cache.put("b", 2, expires_at=1100.0)
+
+        clock.now = 1050.0
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert len(cache) == 1
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the LRU entry is evicted when the cache is full."""
+        cache = TTLCache(maxsize=2, clock=FakeClock())
+        cache.put("a", 1, expires_at=2000.0)
+        cache.put("b", 2, expires_at=2000.0)
+        cache.get("a")
+        cache.put("c", 3, expires_at=2000.0)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_zero_maxsize_disables_cache(self):
+        """Test that a cache with maxsize=0 never stores anything."""
+        cache = TTLCache(maxsize=0, clock=FakeClock())
+        cache.put("a", 1, expires_at=2000.0)
+        assert cache.get("a") is None
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(maxsize, clock):
+        if request.param == "memory":
+            return MemoryBackend(maxsize, clock=clock)
+        return SQLiteBackend(str(tmp_path / "cache.sqlite3"), maxsize, clock=clock)
+
+    return make
+
+
+class TestCacheBackends:
+    """Tests for the read cache backends."""
+
+    def test_entries_expire_after_ttl(self, make_backend):
+        """Test that an entry is served until its TTL passes."""
+        clock = FakeClock()
+        backend = make_backend(10, clock)
+        backend.set("a", b"1", ttl=10.0)
+
+        assert backend.get("a") == b"1"
+        clock.now += 10.0
+        assert backend.get("a") is None
+        assert backend.stats()["hits"] == 1
+        assert backend.stats()["misses"] == 1
+
+    def test_size_is_bounded(self, make_backend):
+        """Test that the backend never holds more than maxsize entries."""
+        backend = make_backend(2, FakeClock())
+        for i, key in enumerate("abc"):
+            backend.set(key, b"x", ttl=10.0 + i)
+
+        assert backend.stats()["size"] == 2
+        assert backend.get("a") is None
+        assert backend.get("c") == b"x"
+
+    def test_counters_increment_until_clear(self, make_backend):
+        """Test that counters start at zero, increment and are reset by clear."""
+        backend = make_backend(2, FakeClock())
+        assert backend.counter("g") == 0
+        assert backend.incr("g") == 1
+        assert backend.incr("g") == 2
+        assert backend.counter("g") == 2
+
+        backend.clear()
+        assert backend.counter("g") == 0
+
+
+class TestSQLiteBackend:
+    """Tests for the SQLite backend shared between workers."""
+
+    def test_workers_share_entries_and_counters(self, tmp_path):
+        """Test that two backends on the same file see each other's writes."""
+        path = str(tmp_path / "cache.sqlite3")
+        first = SQLiteBackend(path, maxsize=10)
+        second = SQLiteBackend(path, maxsize=10)
+
+        first.set("a", b"1", ttl=60.0)
+        first.incr("g")
+        assert second.get("a") == b"1"
+        assert second.counter("g") == 1
@@ -1,15 +1,115 @@
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
 from projects.concord.app.api import app
+from projects.concord.app.common.db import (
+    PIN_COOKIE,
+    AsyncSessionLocal,
+    ReplicaSet,
+    SessionLocal,
+    get_async_db,
+    get_async_read_db,
+    get_db,
+    get_engine,
+    get_read_db,
+    get_sync_db,
+    get_sync_read_db,
+    to_async_url,
+)
+from projects.concord.app.common import db, metrics
+from projects.concord.app.common.config import settings
+from projects.concord.app.common.models import Base, User
+from projects.concord.app.common.read_cache import project_cache
+from projects.concord.app.common.utils import (
+    calibrate,
+    calibrate_rounds,
+    password_hasher,
+)
+from projects.concord.tests.queries import assert_max_queries, count_queries
+
+
+@pytest.fixture(scope="function", autouse=True)
+def fast_password_hashing():
+    """Hash with the cheapest bcrypt work factor to keep the tests fast"""
+    password_hasher.configure("bcrypt", rounds=4)
+    yield
+    password_hasher.configure(
+        settings.HASH_SCHEME, settings.HASH_ROUNDS, settings.HASH_MEMORY_COST
+    )
+
+
+@pytest.fixture(scope="function", autouse=True)
+def empty_project_cache():
+    # every test starts a new database whose ids collide with the last one's
+    project_cache.backend.clear()
+    yield
+    project_cache.backend.clear()
 
 
 @pytest.fixture(scope="function")
-def client():
-    """Create a test client"""
+def engine(tmp_path):
+    """Create a fresh database for a single test"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'concord.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="function", params=["sync", "async"])
+def app_engine(request, engine):
+    """Serve the database through the sync or async path, yield the engine in use"""
+    async_engine = create_async_engine(to_async_url(engine.url), poolclass=NullPool)
+    sync_bind, async_bind = SessionLocal.kw["bind"], AsyncSessionLocal.kw.get("bind")
+    SessionLocal.configure(bind=engine)
+    AsyncSessionLocal.configure(bind=async_engine)
+
+    if request.param == "async":
+        app.dependency_overrides[get_db] = get_async_db
+        app.dependency_overrides[get_read_db] = get_async_read_db
+        yield async_engine.sync_engine
+    else:
+        app.dependency_overrides[get_db] = get_sync_db
+        app.dependency_overrides[get_read_db] = get_sync_read_db
+        yield engine
+
+    app.dependency_overrides.clear()
+    SessionLocal.configure(bind=sync_bind)
+    AsyncSessionLocal.configure(bind=async_bind)
+
+
+@pytest.fixture(scope="function")
+def client(app_engine):
+    """Create a test client backed by a fresh database"""
     with TestClient(app) as c:
         yield c
 
 
+USER = {
+    "first_name": "Ada",
+    "last_name": "Lovelace",
+    "email": "ada@example.com",
+    "password": "hunter2",
+}
+
+
+def create_user(client, user=USER):
+    response = client.post("/users/", json=user)
+    assert response.status_code == 201
+    return response.json()
+
+
+def login(client, user=USER):
+    response = client.post(
+        "/login", data={"username": user["email"], "password": user["password"]}
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
 class TestPingEndpoint:
     """Tests for the /ping endpoint."""
 
@@ -18,3 +118,908 @@ class TestPingEndpoint:
         response = client.get("/ping")
         assert response.status_code == 200
         assert response.json() == {"message": "pong"}
+
+
+class TestStatsEndpoint:
+    """Tests for the /stats endpoint."""
+
+    def test_stats_reports_pools_and_caches(self, client):
+        """Test that stats cover the DB pools, the hasher and the token cache."""
+        get_engine()  # the tests bind their own engines, create the default one
+        response = client.get("/stats")
+        assert response.status_code == 200
+        data = response.json()
+        assert "sync" in data["db_pools"]
+        assert "queue_depth" in data["password_hasher"]
+        assert "hits" in data["token_cache"]
+        assert "hit_rate" in data["project_cache"]
+
+
+class TestMetricsEndpoint:
+    """Tests for the request and DB metrics exposed at /metrics."""
+
+    def sample(self, name, **labels):
+        return metrics.registry.get_sample_value(name, labels) or 0.0
+
+    def test_requests_are_counted_by_route(self, client):
+        """Test that requests are labelled with their route template and status."""
+        create_user(client)
+        headers = login(client)
+        labels = {"method": "GET", "route": "/projects/{id}"}
+        before = self.sample("concord_http_requests_total", status="404", **labels)
+
+        client.get("/projects/1", headers=headers)
+        client.get("/projects/2", headers=headers)
+        after = self.sample("concord_http_requests_total", status="404", **labels)
+        assert after == before + 2
+        assert self.sample("concord_http_requests_in_progress", method="GET") == 0
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'route="/projects/{id}"' in response.text
+
+    def test_db_statements_are_attributed_to_requests(
+        self, client, app_engine, monkeypatch
+    ):
+        """Test that each request reports the statements it executed."""
+        monkeypatch.setattr(project_cache, "ttl", 0)
+        create_user(client)
+        headers = login(client)
+        client.post("/projects/", json=PROJECT, headers=headers)
+
+        labels = {"method": "GET", "route": "/projects/"}
+        before = self.sample("concord_db_statements_per_request_sum", **labels)
+        with count_queries(app_engine) as statements:
+            client.get("/projects/", headers=headers)
+        after = self.sample("concord_db_statements_per_request_sum", **labels)
+        assert after - before == len(statements) == 1
+        assert self.sample("concord_db_duration_per_request_seconds_sum", **labels) > 0
+
+
+class TestLogin:
+    """Tests for the /login endpoint."""
+
+    def test_login_success(self, client):
+        """Test that a registered user can log in."""
+        create_user(client)
+        headers = login(client)
+        assert headers["Authorization"].startswith("Bearer ")
+
+    def test_login_wrong_password(self, client):
+        """Test that a wrong password is rejected."""
+        create_user(client)
+        response = client.post(
+            "/login", data={"username": USER["email"], "password": "wrong"}
+        )
+        assert response.status_code == 403
+
+    def test_login_unknown_user(self, client):
+        """Test that an unknown email is rejected."""
+        response = client.post(
+            "/login", data={"username": "nobody@example.com", "password": "x"}
+        )
+        assert response.status_code == 403
+
+
+def login_tokens(client, user=USER):
+    response = client.post(
+        "/login", data={"username": user["email"], "password": user["password"]}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def bearer(tokens):
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+class TestTokenRefresh:
+    """Tests for the /token/refresh and /token/revoke endpoints."""
+
+    def test_refresh_rotates_tokens(self, client):
+        """Test that a refresh token is exchanged for new working tokens."""
+        user = create_user(client)
+        tokens = login_tokens(client)
+
+        response = client.post(
+            "/token/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
+        assert response.status_code == 200
+        refreshed = response.json()
+        assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+        response = client.get(f"/users/{user['id']}", headers=bearer(refreshed))
+        assert response.status_code == 200
+
+    def test_refresh_skips_password_hashing(self, client):
+        """Test that a refresh never runs bcrypt."""
+        create_user(client)
+        tokens = login_tokens(client)
+        calls = password_hasher.calls
+
+        for _ in range(3):
+            response = client.post(
+                "/token/refresh", json={"refresh_token": tokens["refresh_token"]}
+            )
+            assert response.status_code == 200
+            tokens = response.json()
+        assert password_hasher.calls == calls
+
+    def test_reused_refresh_token_revokes_family(self, client):
+        """Test that replaying a rotated token also revokes its successor."""
+        create_user(client)
+        stolen = login_tokens(client)["refresh_token"]
+        rotated = client.post("/token/refresh", json={"refresh_token": stolen})
+        assert rotated.status_code == 200
+
+        response = client.post("/token/refresh", json={"refresh_token": stolen})
+        assert response.status_code == 401
+
+        response = client.post(
+            "/token/refresh", json={"refresh_token": rotated.json()["refresh_token"]}
+        )
+        assert response.status_code == 401
+
+    def test_revoke(self, client):
+        """Test that a revoked refresh token can no longer be exchanged."""
+        create_user(client)
+        refresh_token = login_tokens(client)["refresh_token"]
+
+        response = client.post("/token/revoke", json={"refresh_token": refresh_token})
+        assert response.status_code == 204
+
+        response = client.post("/token/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 401
+
+    def test_token_types_are_not_interchangeable(self, client):
+        """Test that access and refresh tokens are only accepted for their use."""
+        user = create_user(client)
+        tokens = login_tokens(client)
+
+        response = client.post(
+            "/token/refresh", json={"refresh_token": tokens["access_token"]}
+        )
+        assert response.status_code == 401
+
+        headers = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+        response = client.get(f"/users/{user['id']}", headers=headers)
+        assert response.status_code == 401
+
+    def test_password_change_revokes_refresh_tokens(self, client):
+        """Test that refresh tokens issued before a password change are
+        rejected, and those issued after it still work."""
+        user = create_user(client)
+        before = login_tokens(client)
+        rotated = client.post(
+            "/token/refresh", json={"refresh_token": before["refresh_token"]}
+        ).json()
+
+        changed = {**USER, "password": "correct horse"}
+        response = client.put(
+            f"/users/{user['id']}", json=changed, headers=bearer(before)
+        )
+        assert response.status_code == 200
+
+        for tokens in (before, rotated):
+            response = client.post(
+                "/token/refresh", json={"refresh_token": tokens["refresh_token"]}
+            )
+            assert response.status_code == 401
+
+        after = login_tokens(client, changed)
+        response = client.post(
+            "/token/refresh", json={"refresh_token": after["refresh_token"]}
+        )
+        assert response.status_code == 200
+
+    def test_refresh_for_deleted_user(self, client):
+        """Test that refresh tokens of a deleted user are rejected."""
+        user = create_user(client)
+        tokens = login_tokens(client)
+        response = client.delete(f"/users/{user['id']}", headers=bearer(tokens))
+        assert response.status_code == 204
+
+        response = client.post(
+            "/token/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
+        assert response.status_code == 401
+
+
+@pytest.fixture(scope="function")
+def replica_urls(tmp_path):
+    """A replica holding the schema but none of the primary's rows"""
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return [url]
+
+
+@pytest.fixture(scope="function")
+def use_replicas(monkeypatch):
+    """Route reads to the given replica URLs for the rest of the test"""
+    replica_sets = []
+
+    def use_replicas(urls):
+        replica_set = ReplicaSet(urls, retry_after=60)
+        replica_sets.append(replica_set)
+        monkeypatch.setattr(db, "replicas", replica_set)
+        return replica_set
+
+    yield use_replicas
+    for replica_set in replica_sets:
+        asyncio.run(replica_set.dispose())
+
+
+class TestReadReplicas:
+    """Tests for routing GET requests to the read replicas."""
+
+    def test_reads_go_to_replica(self, client, replica_urls, use_replicas):
+        """Test that GETs are served by the replica once no longer pinned."""
+        replica_set = use_replicas(replica_urls)
+        user = create_user(client)
+        headers = login(client)
+        client.cookies.clear()
+
+        # the user only exists on the primary
+        response = client.get(f"/users/{user['id']}", headers=headers)
+        assert response.status_code == 404
+        assert replica_set.reads == [1]
+
+    def test_writes_pin_client_to_primary(self, client, replica_urls, use_replicas):
+        """Test that a client reads its own writes right after writing."""
+        replica_set = use_replicas(replica_urls)
+        user = create_user(client)
+        headers = login(client)
+
+        response = client.get(f"/users/{user['id']}", headers=headers)
+        assert response.status_code == 200
+        assert replica_set.reads == [0]
+
+    @pytest.mark.parametrize("fast_json", [False, True])
+    def test_every_write_pins_client(
+        self, client, replica_urls, use_replicas, monkeypatch, fast_json
+    ):
+        """Test that routes returning their own Response also set the pin."""
+        monkeypatch.setattr(settings, "FAST_JSON", fast_json)
+        use_replicas(replica_urls)
+        user = create_user(client)
+        headers = login(client)
+
+        def pinned(response):
+            assert response.status_code < 300
+            return PIN_COOKIE in response.headers.get("set-cookie", "")
+
+        client.cookies.clear()
+        response = client.post("/projects/bulk", json=[PROJECT], headers=headers)
+        assert pinned(response)
+        project_id = response.json()["created"][0]["id"]
+
+        client.cookies.clear()
+        assert pinned(client.delete(f"/projects/{project_id}", headers=headers))
+        client.cookies.clear()
+        assert pinned(client.delete(f"/users/{user['id']}", headers=headers))
+
+    def test_cached_reads_skip_replica(self, client, engine, use_replicas):
+        """Test that reads answered from the cache never check out a replica."""
+        # the primary's own file stands in for an up to date replica
+        replica_set = use_replicas([str(engine.url)])
+        create_user(client)
+        headers = login(client)
+        project = client.post("/projects/", json=PROJECT, headers=headers).json()
+        # still pinned, read from the primary and cached
+        response = client.get(f"/projects/{project['id']}", headers=headers)
+        assert response.status_code == 200
+        client.cookies.clear()
+
+        for _ in range(3):
+            response = client.get(f"/projects/{project['id']}", headers=headers)
+            assert response.status_code == 200
+        assert replica_set.reads == [0]
+
+    def test_lagging_replica_reads_are_not_cached(
+        self, client, replica_urls, use_replicas
+    ):
+        """Test that a pinned client sees its writes even after another reader
+        got stale rows from a lagging replica."""
+        replica_set = use_replicas(replica_urls)
+        create_user(client)
+        headers = login(client)
+        project = client.post("/projects/", json=PROJECT, headers=headers).json()
+        pin = client.cookies[PIN_COOKIE]
+
+        # another device of the owner, served by the replica without the write
+        client.cookies.clear()
+        for _ in range(2):
+            assert client.get("/projects/", headers=headers).json() == []
+            response = client.get(f"/projects/{project['id']}", headers=headers)
+            assert response.status_code == 404
+        assert replica_set.reads == [4]
+
+        client.cookies.set(PIN_COOKIE, pin)
+        projects = client.get("/projects/", headers=headers).json()
+        assert [p["name"] for p in projects] == [PROJECT["name"]]
+        response = client.get(f"/projects/{project['id']}", headers=headers)
+        assert response.json()["name"] == PROJECT["name"]
+        assert replica_set.reads == [4]
+
+    def test_unreachable_replica_falls_back(self, client, tmp_path, use_replicas):
+        """Test that the primary serves reads while no replica is healthy."""
+        unreachable = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+        replica_set = use_replicas([unreachable])
+        user = create_user(client)
+        headers = login(client)
+        client.cookies.clear()
+
+        for _ in range(2):
+            response = client.get(f"/users/{user['id']}", headers=headers)
+            assert response.status_code == 200
+        # only tried once, then skipped until retry_after passes
+        assert replica_set.failures == [1]
+        assert replica_set.stats()["primary_fallbacks"] == 2
+
+    def test_round_robin(self):
+        """Test that replicas take turns and failed ones are skipped."""
+        now = [0.0]
+        replica_set = ReplicaSet(["a", "b", "c"], retry_after=5, clock=lambda: now[0])
+        assert [replica_set.candidates()[0] for _ in range(4)] == [0, 1, 2, 0]
+
+        replica_set.mark_down(2)
+        assert [replica_set.candidates()[0] for _ in range(3)] == [1, 0, 0]
+
+        now[0] = 5.0
+        assert replica_set.candidates() == [1, 2, 0]
+
+
+class TestUsers:
+    """Tests for the /users routes."""
+
+    def test_create_user_hashes_password(self, client):
+        """Test that the created user is returned without its password."""
+        data = create_user(client)
+        assert data["email"] == USER["email"]
+        assert "password" not in data
+
+    def test_update_user_rehashes_password(self, client):
+        """Test that a user can change their password and log in with it."""
+        user_id = create_user(client)["id"]
+        headers = login(client)
+
+        updated = {**USER, "password": "correct horse"}
+        response = client.put(f"/users/{user_id}", json=updated, headers=headers)
+        assert response.status_code == 200
+        login(client, updated)
+
+    def test_get_update_delete_other_user(self, client):
+        """Test that users can only read and modify themselves."""
+        user_id = create_user(client)["id"]
+        other = {**USER, "first_name": "Grace", "email": "grace@example.com"}
+        other_id = create_user(client, other)["id"]
+        headers = login(client)
+
+        assert client.get(f"/users/{other_id}", headers=headers).status_code == 401
+        response = client.put(f"/users/{other_id}", json=USER, headers=headers)
+        assert response.status_code == 401
+        assert other["email"] in response.json()["detail"]
+        assert client.delete(f"/users/{other_id}", headers=headers).status_code == 401
+        assert client.delete("/users/999", headers=headers).status_code == 404
+
+        assert client.delete(f"/users/{user_id}", headers=headers).status_code == 204
+        assert client.get(f"/users/{user_id}", headers=headers).status_code == 404
+
+    def test_create_user_rejected_when_hash_queue_full(self, client, monkeypatch):
+        """Test that a full hashing queue sheds load with a 503."""
+        monkeypatch.setattr(password_hasher, "max_pending", 0)
+        response = client.post("/users/", json=USER)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+
+PROJECT = {"name": "Concord", "description": "task tracker", "priority": "high"}
+
+
+class TestProjects:
+    """Tests for the /projects routes."""
+
+    def test_create_and_list_projects(self, client):
+        """Test that created projects are listed with their owner."""
+        create_user(client)
+        headers = login(client)
+
+        response = client.post("/projects/", json=PROJECT, headers=headers)
+        assert response.status_code == 201
+        assert response.json()["owner"]["email"] == USER["email"]
+        assert response.json()["created_at"]
+
+        response = client.get("/projects/", headers=headers)
+        assert response.status_code == 200
+        assert [p["name"] for p in response.json()] == ["Concord"]
+
+    def test_get_update_delete_project(self, client):
+        """Test the lifecycle of a single project."""
+        create_user(client)
+        headers = login(client)
+        project_id = client.post("/projects/", json=PROJECT, headers=headers).json()[
+            "id"
+        ]
+
+        response = client.get(f"/projects/{project_id}", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["priority"] == "high"
+
+        updated = {**PROJECT, "priority": "low"}
+        response = client.put(f"/projects/{project_id}", json=updated, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["priority"] == "low"
+
+        response = client.delete(f"/projects/{project_id}", headers=headers)
+        assert response.status_code == 204
+        response = client.get(f"/projects/{project_id}", headers=headers)
+        assert response.status_code == 404
+
+    def test_other_users_project_is_forbidden(self, client):
+        """Test that a user cannot read or modify another user's project."""
+        create_user(client)
+        headers = login(client)
+        project_id = client.post("/projects/", json=PROJECT, headers=headers).json()[
+            "id"
+        ]
+
+        other = {**USER, "first_name": "Grace", "email": "grace@example.com"}
+        create_user(client, other)
+        other_headers = login(client, other)
+
+        for method in ("get", "delete"):
+            response = client.request(
+                method, f"/projects/{project_id}", headers=other_headers
+            )
+            assert response.status_code == 401
+        response = client.put(
+            f"/projects/{project_id}", json=PROJECT, headers=other_headers
+        )
+        assert response.status_code == 401
+        assert USER["email"] in response.json()["detail"]
+
+        response = client.get(f"/projects/{project_id}", headers=headers)
+        assert response.json()["priority"] == "high"
+
+    def test_writes_take_one_statement(self, client, app_engine):
+        """Test that ownership-checked writes only re-query on a miss."""
+        create_user(client)
+        headers = login(client)
+        project_id = client.post("/projects/", json=PROJECT, headers=headers).json()[
+            "id"
+        ]
+
+        with assert_max_queries(app_engine, 1):
+            response = client.put(
+                f"/projects/{project_id}",
+                json={**PROJECT, "name": "renamed"},
+                headers=headers,
+            )
+        assert response.json()["name"] == "renamed"
+        assert response.json()["owner"]["email"] == USER["email"]
+
+        with assert_max_queries(app_engine, 2):
+            response = client.put("/projects/999", json=PROJECT, headers=headers)
+        assert response.status_code == 404
+
+        with assert_max_queries(app_engine, 1):
+            response = client.delete(f"/projects/{project_id}", headers=headers)
+        assert response.status_code == 204
+
+    @pytest.mark.parametrize("count", [1, 10])
+    def test_project_reads_load_owners_in_one_query(self, client, app_engine, count):
+        """Test that reading projects does not issue a query per owner."""
+        create_user(client)
+        headers = login(client)
+        ids = [
+            client.post(
+                "/projects/", json={**PROJECT, "name": f"p{i}"}, headers=headers
+            ).json()["id"]
+            for i in range(count)
+        ]
+
+        with assert_max_queries(app_engine, 1):
+            response = client.get("/projects/", headers=headers)
+        assert len(response.json()) == count
+        assert all(p["owner"]["email"] == USER["email"] for p in response.json())
+
+        with assert_max_queries(app_engine, 1):
+            client.get(f"/projects/{ids[0]}", headers=headers)
+        with assert_max_queries(app_engine, 1):
+            client.put(f"/projects/{ids[0]}", json=PROJECT, headers=headers)
+
+    def test_fast_json_matches_response_model(self, client, monkeypatch):
+        """Test that FAST_JSON responses are identical to the response_model ones."""
+        create_user(client)
+        headers = login(client)
+        items = [{**PROJECT, "name": f"p{i}"} for i in range(3)]
+        client.post("/projects/bulk", json=items, headers=headers)
+
+        params = {"limit": 2}
+        expected = client.get("/projects/", params=params, headers=headers)
+        monkeypatch.setattr(settings, "FAST_JSON", True)
+        response = client.get("/projects/", params=params, headers=headers)
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == expected.json()
+        assert response.headers["X-Next-Cursor"] == expected.headers["X-Next-Cursor"]
+
+        items = [{**PROJECT, "name": "fast"}, {**PROJECT, "name": "p0"}]
+        response = client.post("/projects/bulk", json=items, headers=headers)
+        assert response.status_code == 201
+        assert response.json()["created"][0]["name"] == "fast"
+        assert response.json()["errors"][0]["index"] == 1
+
+
+class TestProjectCache:
+    """Tests for the per-owner cache of project reads."""
+
+    def test_reads_are_served_from_cache(self, client, app_engine):
+        """Test that repeated reads skip the database until a write."""
+        create_user(client)
+        headers = login(client)
+        project_id = client.post("/projects/", json=PROJECT, headers=headers).json()[
+            "id"
+        ]
+
+        first = client.get("/projects/", params={"limit": 1}, headers=headers)
+        client.get(f"/projects/{project_id}", headers=headers)
+        with assert_max_queries(app_engine, 0):
+            response = client.get("/projects/", params={"limit": 1}, headers=headers)
+            assert response.json() == first.json()
+            response = client.get(f"/projects/{project_id}", headers=headers)
+            assert response.json()["name"] == PROJECT["name"]
+        assert project_cache.stats()["hits"] >= 2
+
+        client.put(
+            f"/projects/{project_id}",
+            json={**PROJECT, "name": "renamed"},
+            headers=headers,
+        )
+        response = client.get(f"/projects/{project_id}", headers=headers)
+        assert response.json()["name"] == "renamed"
+        response = client.get("/projects/", params={"limit": 1}, headers=headers)
+        assert response.json()[0]["name"] == "renamed"
+
+    def test_every_write_invalidates_owner(self, client):
+        """Test that creates, deletes and owner updates are visible at once."""
+        user_id = create_user(client)["id"]
+        headers = login(client)
+        assert client.get("/projects/", headers=headers).json() == []
+
+        created = client.post("/projects/bulk", json=[PROJECT], headers=headers)
+        project_id = created.json()["created"][0]["id"]
+        assert len(client.get("/projects/", headers=headers).json()) == 1
+
+        client.put(
+            f"/users/{user_id}",
+            json={**USER, "first_name": "Augusta"},
+            headers=headers,
+        )
+        projects = client.get("/projects/", headers=headers).json()
+        assert projects[0]["owner"]["first_name"] == "Augusta"
+
+        client.post(
+            "/projects/bulk/delete", json={"ids": [project_id]}, headers=headers
+        )
+        assert client.get("/projects/", headers=headers).json() == []
+
+    def test_other_users_are_not_served_cached_projects(self, client):
+        """Test that a cached project is not returned to another user."""
+        create_user(client)
+        headers = login(client)
+        project_id = client.post("/projects/", json=PROJECT, headers=headers).json()[
+            "id"
+        ]
+        client.get(f"/projects/{project_id}", headers=headers)
+
+        other = {**USER, "first_name": "Grace", "email": "grace@example.com"}
+        create_user(client, other)
+        response = client.get(f"/projects/{project_id}", headers=login(client, other))
+        assert response.status_code == 401
+
+
+class TestConditionalGets:
+    """Tests for ETag / If-None-Match on project and user reads."""
+
+    @pytest.fixture(params=["cached", "uncached"])
+    def cache_mode(self, request, monkeypatch):
+        if request.param == "uncached":
+            monkeypatch.setattr(project_cache, "ttl", 0)
+        return request.param
+
+    def test_unchanged_projects_are_not_modified(self, client, app_engine, cache_mode):
+        """Test that a matching ETag is a 304 decided by at most a version query."""
+        create_user(client)
+        headers = login(client)
+        project_id = client.post("/projects/", json=PROJECT, headers=headers).json()[
+            "id"
+        ]
+
+        for url in ("/projects/", f"/projects/{project_id}"):
+            etag = client.get(url, headers=headers).headers["ETag"]
+            with assert_max_queries(app_engine, 1) as statements:
+                response = client.get(url, headers={**headers, "If-None-Match": etag})
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response.headers["ETag"] == etag
+            assert all("description" not in statement for statement in statements)
+
+            response = client.get(
+                url, headers={**headers, "If-None-Match": f'W/{etag}, "other"'}
+            )
+            assert response.status_code == 304
+
+        client.put(
+            f"/projects/{project_id}",
+            json={**PROJECT, "priority": "low"},
+            headers=headers,
+        )
+        response = client.get("/projects/", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_owner_update_changes_project_etag(self, client):
+        """Test that editing the embedded owner changes the projects' ETag."""
+        user_id = create_user(client)["id"]
+        headers = login(client)
+        client.post("/projects/", json=PROJECT, headers=headers)
+        etag = client.get("/projects/", headers=headers).headers["ETag"]
+
+        client.put(
+            f"/users/{user_id}",
+            json={**USER, "first_name": "Augusta"},
+            headers=headers,
+        )
+        response = client.get("/projects/", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()[0]["owner"]["first_name"] == "Augusta"
+
+    def test_unchanged_user_is_not_modified(self, client, app_engine):
+        """Test that GET /users/{id} honours If-None-Match until the user changes."""
+        user_id = create_user(client)["id"]
+        headers = login(client)
+        etag = client.get(f"/users/{user_id}", headers=headers).headers["ETag"]
+
+        with assert_max_queries(app_engine, 1):
+            response = client.get(
+                f"/users/{user_id}", headers={**headers, "If-None-Match": etag}
+            )
+        assert response.status_code == 304
+
+        client.put(
+            f"/users/{user_id}", json={**USER, "last_name": "Byron"}, headers=headers
+        )
+        response = client.get(
+            f"/users/{user_id}", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+class TestProjectPagination:
+    """Tests for keyset pagination, filtering and sorting of GET /projects/."""
+
+    def create_projects(self, client, headers, priorities):
+        for i, priority in enumerate(priorities):
+            response = client.post(
+                "/projects/",
+                json={**PROJECT, "name": f"p{i}", "priority": priority},
+                headers=headers,
+            )
+            assert response.status_code == 201
+
+    def fetch_all(self, client, headers, **params):
+        names, pages, after = [], 0, None
+        while True:
+            query = {**params, **({"after": after} if after else {})}
+            response = client.get("/projects/", params=query, headers=headers)
+            assert response.status_code == 200
+            names += [p["name"] for p in response.json()]
+            pages += 1
+            after = response.headers.get("X-Next-Cursor")
+            if after is None:
+                return names, pages
+
+    def test_pages_cover_every_project_once(self, client):
+        """Test that following cursors returns each project exactly once in order."""
+        create_user(client)
+        headers = login(client)
+        self.create_projects(client, headers, ["low"] * 5)
+
+        names, pages = self.fetch_all(client, headers, limit=2)
+        assert names == ["p0", "p1", "p2", "p3", "p4"]
+        assert pages == 3
+
+        names, _ = self.fetch_all(client, headers, limit=2, order="desc")
+        assert names == ["p4", "p3", "p2", "p1", "p0"]
+
+    def test_sort_by_priority_and_filter(self, client):
+        """Test sorting by priority with ties and filtering by priority."""
+        create_user(client)
+        headers = login(client)
+        self.create_projects(client, headers, ["high", "low", "high", "low", "high"])
+
+        names, _ = self.fetch_all(client, headers, limit=2, sort_by="priority")
+        assert sorted(names) == ["p0", "p1", "p2", "p3", "p4"]
+        high_first = names[:3] == ["p0", "p2", "p4"]
+        low_first = names[:2] == ["p1", "p3"]
+        assert high_first or low_first
+
+        names, _ = self.fetch_all(client, headers, limit=2, priority="high")
+        assert names == ["p0", "p2", "p4"]
+
+    def test_created_at_range_filter(self, client):
+        """Test that created_at bounds exclude projects outside the range."""
+        create_user(client)
+        headers = login(client)
+        self.create_projects(client, headers, ["low"])
+
+        response = client.get(
+            "/projects/",
+            params={"created_after": "2100-01-01T00:00:00"},
+            headers=headers,
+        )
+        assert response.json() == []
+        response = client.get(
+            "/projects/",
+            params={"created_before": "2100-01-01T00:00:00"},
+            headers=headers,
+        )
+        assert len(response.json()) == 1
+
+    def test_invalid_cursor_is_rejected(self, client):
+        """Test that a malformed or mismatched cursor is a 400."""
+        create_user(client)
+        headers = login(client)
+        self.create_projects(client, headers, ["low", "low"])
+
+        response = client.get(
+            "/projects/", params={"after": "garbage"}, headers=headers
+        )
+        assert response.status_code == 400
+
+        after = client.get("/projects/", params={"limit": 1}, headers=headers).headers[
+            "X-Next-Cursor"
+        ]
+        response = client.get(
+            "/projects/",
+            params={"after": after, "sort_by": "priority"},
+            headers=headers,
+        )
+        assert response.status_code == 400
+
+
+class TestProjectBulk:
+    """Tests for the bulk /projects/bulk routes."""
+
+    def test_bulk_create_reports_duplicates(self, client, app_engine):
+        """Test that one request creates many projects and skips duplicate names."""
+        create_user(client)
+        headers = login(client)
+        client.post("/projects/", json=PROJECT, headers=headers)
+
+        items = [{**PROJECT, "name": f"p{i}"} for i in range(50)]
+        items += [PROJECT, {**PROJECT, "name": "p0"}]
+        with assert_max_queries(app_engine, 2):
+            response = client.post("/projects/bulk", json=items, headers=headers)
+        assert response.status_code == 201
+        created = response.json()["created"]
+        assert [p["name"] for p in created] == [f"p{i}" for i in range(50)]
+        assert created[0]["owner"]["email"] == USER["email"]
+        assert [e["index"] for e in response.json()["errors"]] == [50, 51]
+
+        response = client.get("/projects/", headers=headers)
+        assert len(response.json()) == 51
+
+    def test_bulk_update_and_delete_check_ownership(self, client):
+        """Test that bulk writes only touch the caller's own projects."""
+        create_user(client)
+        headers = login(client)
+        items = [{**PROJECT, "name": f"p{i}"} for i in range(3)]
+        ids = [
+            p["id"]
+            for p in client.post("/projects/bulk", json=items, headers=headers).json()[
+                "created"
+            ]
+        ]
+
+        other = {**USER, "first_name": "Grace", "email": "grace@example.com"}
+        create_user(client, other)
+        other_headers = login(client, other)
+        other_id = client.post(
+            "/projects/", json={**PROJECT, "name": "theirs"}, headers=other_headers
+        ).json()["id"]
+
+        response = client.patch(
+            "/projects/bulk",
+            json=[
+                {"id": ids[0], "priority": "low"},
+                {"id": ids[1], "name": "renamed", "description": "moved"},
+                {"id": ids[2], "name": "p0"},
+                {"id": other_id, "priority": "low"},
+            ],
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["updated"] == ids[:2]
+        assert [e["index"] for e in response.json()["errors"]] == [2, 3]
+
+        projects = [client.get(f"/projects/{id}", headers=headers).json() for id in ids]
+        assert (projects[0]["name"], projects[0]["priority"]) == ("p0", "low")
+        assert (projects[1]["name"], projects[1]["description"]) == ("renamed", "moved")
+        assert projects[2]["name"] == "p2"
+
+        response = client.post(
+            "/projects/bulk/delete",
+            json={"ids": [ids[0], other_id, 999]},
+            headers=headers,
+        )
+        assert response.json()["deleted"] == [ids[0]]
+        assert [e["index"] for e in response.json()["errors"]] == [1, 2]
+        response = client.get(f"/projects/{other_id}", headers=other_headers)
+        assert response.status_code == 200
+
+    def test_bulk_size_is_limited(self, client, monkeypatch):
+        """Test that requests over BULK_MAX_ITEMS are rejected."""
+        create_user(client)
+        headers = login(client)
+        monkeypatch.setattr(settings, "BULK_MAX_ITEMS", 2)
+
+        items = [{**PROJECT, "name": f"p{i}"} for i in range(3)]
+        response = client.post("/projects/bulk", json=items, headers=headers)
+        assert response.status_code == 413
+        response = client.post(
+            "/projects/bulk/delete", json={"ids": [1, 2, 3]}, headers=headers
+        )
+        assert response.status_code == 413
+
+
+class TestPasswordHashing:
+    """Tests for work factor calibration and rehash-on-login."""
+
+    def test_calibrate_rounds_respects_budget(self):
+        """Test that calibration never goes below the scheme minimum."""
+        assert calibrate_rounds("bcrypt", budget_ms=0) == 4
+        assert calibrate_rounds("bcrypt", budget_ms=50) >= 4
+
+    def test_calibrate_sets_argon2_memory_cost(self):
+        """Test that argon2 calibration halves the memory until a hash fits."""
+        assert calibrate("bcrypt", budget_ms=0) == (4, None)
+        assert calibrate("argon2", budget_ms=0, max_memory_cost=1024) == (1, 32)
+        rounds, memory_cost = calibrate("argon2", budget_ms=50, max_memory_cost=1024)
+        assert memory_cost == 1024
+        assert rounds >= 1
+
+    def test_argon2_hashes_and_verifies(self, client, engine):
+        """Test that argon2 hashes with its memory cost and still verifies
+        bcrypt hashes, upgrading them on login."""
+        create_user(client)
+        password_hasher.configure("argon2", rounds=1, memory_cost=1024)
+
+        login(client)
+        with Session(engine) as session:
+            stored = session.query(User).one().password
+        assert stored.startswith("$argon2id$")
+        assert "m=1024,t=1" in stored
+        assert not password_hasher.needs_update(stored)
+        login(client)
+
+        response = client.post(
+            "/login", data={"username": USER["email"], "password": "wrong"}
+        )
+        assert response.status_code == 403
+
+    def test_login_rehashes_outdated_hash(self, client, engine):
+        """Test that logging in upgrades a hash made with other parameters."""
+        create_user(client)
+        password_hasher.configure("bcrypt", rounds=5)
+
+        login(client)
+        with Session(engine) as session:
+            stored = session.query(User).one().password
+        assert stored.startswith("$2b$05$")
+        assert not password_hasher.needs_update(stored)
+        login(client)
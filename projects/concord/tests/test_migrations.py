@@ -0,0 +1,87 @@
+import logging
+import pytest
+import sqlalchemy as sa
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from projects.concord.db.alembic import online
+
+
+@pytest.fixture(scope="function")
+def connection(tmp_path):
+    """Run alembic operations against a fresh database with 25 rows"""
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+        conn.exec_driver_sql(
+            "CREATE TABLE projects (id INTEGER PRIMARY KEY, owner_id INTEGER)"
+        )
+        conn.execute(
+            sa.text("INSERT INTO users (id) VALUES (:id)"),
+            [{"id": i} for i in range(1, 26)],
+        )
+        conn.execute(
+            sa.text("INSERT INTO projects (id, owner_id) VALUES (:id, :id)"),
+            [{"id": i} for i in range(1, 26)],
+        )
+
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn)
+        with Operations.context(context), context.begin_transaction():
+            yield conn
+    engine.dispose()
+
+
+class TestOnlineMigrations:
+    """Tests for the online-safe alembic helpers."""
+
+    def test_add_column_online(self, connection, caplog):
+        """Test that a NOT NULL column is backfilled in batches."""
+        column = sa.Column("version", sa.Integer(), nullable=False)
+        with caplog.at_level(logging.INFO, logger="alembic.online"):
+            online.add_column_online(
+                "users", column, sa.column("id") * 2, batch_size=10, pause=0
+            )
+
+        assert len(caplog.records) == 3  # rows 1-10, 11-20 and 21-25
+        rows = connection.execute(sa.text("SELECT id, version FROM users")).all()
+        assert all(version == 2 * id for id, version in rows)
+
+        (version,) = [
+            c
+            for c in sa.inspect(connection).get_columns("users")
+            if c["name"] == "version"
+        ]
+        assert not version["nullable"]
+
+    def test_backfill_skips_filled_rows(self, connection):
+        """Test that a rerun backfill only updates rows still NULL."""
+        online.op.add_column("users", sa.Column("nickname", sa.String()))
+        connection.exec_driver_sql("UPDATE users SET nickname = 'kept' WHERE id = 1")
+
+        updated = online.backfill("users", "nickname", "new", pause=0)
+
+        assert updated == 24
+        assert (
+            connection.exec_driver_sql(
+                "SELECT nickname FROM users WHERE id = 1"
+            ).scalar()
+            == "kept"
+        )
+
+    def test_create_index_concurrently(self, connection):
+        """Test that the index is built where CONCURRENTLY isn't supported."""
+        online.create_index_concurrently(
+            "ix_projects_owner_id", "projects", ["owner_id"]
+        )
+
+        indexes = sa.inspect(connection).get_indexes("projects")
+        assert [index["name"] for index in indexes] == ["ix_projects_owner_id"]
+
+    def test_create_foreign_key_online(self, connection):
+        """Test that the foreign key is created where NOT VALID isn't supported."""
+        online.create_foreign_key_online(
+            "projects_users_fk", "projects", "users", ["owner_id"], ["id"]
+        )
+
+        (foreign_key,) = sa.inspect(connection).get_foreign_keys("projects")
+        assert foreign_key["referred_table"] == "users"
@@ -0,0 +1,46 @@
+import pytest
+from projects.concord.app.common.oath2 import (
+    CredentialsException,
+    JWTPayload,
+    create_access_token,
+    create_refresh_token,
+    get_current_user_id,
+    token_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    """Start every test with an empty token cache."""
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+class TestGetCurrentUserId:
+    """Tests for bearer token verification."""
+
+    def test_valid_token_is_cached(self):
+        """Test that a second lookup of the same token is a cache hit."""
+        token = create_access_token(data=JWTPayload(user_id=7).model_dump())
+        hits, misses = token_cache.hits, token_cache.misses
+
+        assert get_current_user_id(token) == 7
+        assert get_current_user_id(token) == 7
+        assert token_cache.hits == hits + 1
+        assert token_cache.misses == misses + 1
+
+    def test_invalid_token_is_not_cached(self):
+        """Test that a token failing verification is rejected and never cached."""
+        with pytest.raises(CredentialsException):
+            get_current_user_id("not-a-jwt")
+        assert len(token_cache) == 0
+
+    def test_refresh_token_is_rejected(self):
+        """Test that a refresh token can't be used as a bearer token."""
+        token = create_refresh_token(
+            data=JWTPayload(user_id=7).model_dump(), generation=0
+        )
+        with pytest.raises(CredentialsException):
+            get_current_user_id(token)
+        assert len(token_cache) == 0
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError
+from projects.concord.app.common.pool import PoolStats, TimedQueuePool
+
+
+@pytest.fixture(scope="function")
+def engine(tmp_path):
+    """Create an engine whose pool holds a single connection"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+
+class TestPoolStats:
+    """Tests for connection pool instrumentation."""
+
+    def test_checkouts_are_counted(self, engine):
+        """Test that checkouts, new connections and waits are recorded."""
+        stats = PoolStats(engine)
+        for _ in range(3):
+            with engine.connect():
+                pass
+
+        snapshot = stats.snapshot()
+        assert snapshot["connects"] == 1
+        assert snapshot["checkouts"] == 3
+        assert snapshot["checked_out"] == 0
+        assert stats.waits == 3
+
+    def test_exhausted_pool_records_timeout(self, engine):
+        """Test that a checkout timing out on a full pool is counted."""
+        stats = PoolStats(engine)
+        with engine.connect():
+            assert stats.snapshot()["checked_out"] == 1
+            with pytest.raises(TimeoutError):
+                engine.connect()
+
+        assert stats.snapshot()["timeouts"] == 1
+        assert stats.snapshot()["max_wait_ms"] >= 50
+
+    def test_stats_survive_dispose(self, engine):
+        """Test that a recreated pool keeps reporting to the same stats."""
+        stats = PoolStats(engine)
+        engine.dispose()
+        with engine.connect():
+            pass
+        assert stats.snapshot()["checkouts"] == 1
+        assert stats.waits == 1